@@ -1 +1,10 @@
 from .normalize import *
+from .codegen import *
+from .batch import *
+from .delta import *
+from .stream import *
+from .parallel import *
+from .aio import *
+from .cache import *
+from .projection import *
+from .writers import *
@@ -0,0 +1,83 @@
+import typing
+import asyncio
+import functools
+import collections
+import concurrent.futures
+from .normalize import Mapping, CompiledMapping, compile_mapping, translate
+from .parallel import translate_chunk
+
+async def atranslate(
+    target: typing.Any,
+    mapping: Mapping | CompiledMapping,
+    substitute: dict[str, typing.Any] = {},
+    executor: concurrent.futures.Executor | None = None
+) -> typing.Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(translate, target, mapping, substitute=substitute))
+
+async def _achunked(records: typing.AsyncIterable[typing.Any] | typing.Iterable[typing.Any], chunk_size: int):
+    chunk: list[typing.Any] = []
+    start = 0
+
+    async def aiter_records():
+        if isinstance(records, typing.AsyncIterable):
+            async for record in records:
+                yield record
+        else:
+            for record in records:
+                yield record
+
+    async for record in aiter_records():
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield start, chunk
+            start += len(chunk)
+            chunk = []
+
+    if chunk:
+        yield start, chunk
+
+async def atranslate_stream(
+    records: typing.AsyncIterable[typing.Any] | typing.Iterable[typing.Any],
+    mapping: Mapping | CompiledMapping,
+    concurrency: int = 4,
+    chunk_size: int = 64,
+    ordered: bool = True,
+    executor: concurrent.futures.Executor | None = None,
+    substitute: dict[str, typing.Any] = {}
+) -> typing.AsyncIterator[typing.Any]:
+    """
+    Translates records from an (async) iterable in an executor, `chunk_size`
+    records at a time and at most `concurrency` chunks in flight, so the
+    event loop is never blocked and a slow consumer stops the source from
+    being read ahead. Failed records yield a RecordError.
+    """
+    compiled = mapping \
+        if isinstance(mapping, CompiledMapping) \
+        else compile_mapping(mapping)
+
+    loop = asyncio.get_running_loop()
+    pending: collections.deque[asyncio.Future[list[typing.Any]]] = collections.deque()
+
+    async def next_done():
+        if ordered:
+            return await pending.popleft()
+
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        future = done.pop()
+        pending.remove(future)
+        return future.result()
+
+    try:
+        async for start, chunk in _achunked(records, chunk_size):
+            pending.append(loop.run_in_executor(executor, translate_chunk, start, chunk, compiled, substitute))
+            if len(pending) >= concurrency:
+                for result in await next_done():
+                    yield result
+
+        while pending:
+            for result in await next_done():
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,195 @@
+# pyright: reportPrivateUsage=false
+# runs the interpreter's private lookup and modifier steps a column at a time
+import typing
+import itertools
+import unicodedata
+from .normalize import Mapping, RawObject, CompiledMapping, CompiledNode, PathResolver, compile_mapping, _cast_numbers, _check_types, _enforce, _finish, _lookup, _translate, _translate_child
+
+def _translate_column(
+    node: CompiledNode,
+    targets: list[RawObject],
+    resolvers: list[PathResolver],
+    substitute: dict[str, typing.Any],
+    errors: list[Exception | None]
+):
+    values: list[typing.Any] = [None] * len(targets)
+    pending: list[int] = []
+    names: list[str] = [''] * len(targets)
+
+    alt = node.alternatives[0] if len(node.alternatives) == 1 else None
+    if alt and alt.name and alt.parts is None and not alt.is_path and not alt.is_var and node.mapping is None:
+        # a single same-level name: _lookup() and its fallback both come down to target.get()
+        values = [target.get(alt.name) for target in targets]
+        names = [alt.name] * len(targets)
+        pending = list(range(len(targets)))
+        targets = []
+
+    for j, target in enumerate(targets):
+        try:
+            initial_value, mapped_name, var_name = _lookup(node, target, 0, resolvers[j])
+
+            if var_name:
+                values[j] = substitute.get(var_name)
+            elif node.mapping is not None:
+                values[j] = _translate_child(node, target, initial_value, resolvers[j], substitute)
+            else:
+                if initial_value == None:
+                    initial_value = resolvers[j].get(mapped_name) \
+                        if mapped_name[0] == '.' \
+                        else target.get(mapped_name)
+
+                values[j] = initial_value
+                names[j] = mapped_name
+                pending.append(j)
+        except Exception as e:
+            errors[j] = e
+
+    if not pending:
+        return values
+
+    if (memo := node.memo) is not None:
+        for j in pending:
+            try:
+                values[j] = memo(node, names[j], values[j])
+            except Exception as e:
+                errors[j] = e
+        return values
+
+    def apply(rows: list[int], fn: typing.Callable[[typing.Any], typing.Any]):
+        ok: list[int] = []
+        for j in rows:
+            try:
+                values[j] = fn(values[j])
+                ok.append(j)
+            except Exception as e:
+                errors[j] = e
+        return ok
+
+    # same steps as _handle_modifiers() and _finish(), one column at a time
+    present: list[int] = []
+    finish: list[int] = []
+    for j in pending:
+        if values[j] != None:
+            present.append(j)
+        elif node.has_default:
+            values[j] = node.default
+            present.append(j)
+        elif node.default_null:
+            finish.append(j)
+        else:
+            errors[j] = ValueError('value for %s wasnt provided' % names[j])
+
+    if node.normalize_unicode:
+        for j in present:
+            if isinstance(values[j], str):
+                values[j] = unicodedata.normalize('NFKD', values[j])
+
+    if trim_start := node.trim_start:
+        present = apply(present, lambda value: value[trim_start*-1:])
+
+    if trim_end := node.trim_end:
+        present = apply(present, lambda value: value[:trim_end])
+
+    if pick := node.pick_until:
+        present = apply(present, lambda value: value.split(pick)[0])
+
+    if node.enforce:
+        if (accepted := node.accepted) is not None:
+            cast = [j for j in present if values[j].__class__.__name__ not in accepted]
+            if cast and node.type in ('number', 'integer'):
+                failed: set[int] = set()
+                for j, value in zip(cast, _cast_numbers([values[j] for j in cast], node.type == 'integer')):
+                    if isinstance(value, Exception):
+                        errors[j] = value
+                        failed.add(j)
+                    else:
+                        values[j] = value
+                present = [j for j in present if j not in failed]
+            elif cast:
+                failed = set(cast).difference(apply(cast, lambda value: _enforce(node, value)))
+                present = [j for j in present if j not in failed]
+        else:
+            present = apply(present, lambda value: _enforce(node, value) if _check_types(node, value) else value)
+
+    rows = sorted(finish + present)
+    if (accepted := node.accepted) is not None:
+        if not node.default:
+            for j in rows:
+                if (actual := values[j].__class__.__name__) not in accepted:
+                    errors[j] = ValueError('check_types @ %s (got "%s", expected "%s")' % (node.name, actual, node.type))
+    else:
+        apply(rows, lambda value: _finish(node, value))
+
+    return values
+
+def _translate_block(
+    records: list[typing.Any],
+    plan: CompiledMapping,
+    substitute: dict[str, typing.Any]
+):
+    rows: list[typing.Any] = [None] * len(records)
+    errors: list[Exception | None] = [None] * len(records)
+    active: list[int] = []
+
+    for i, record in enumerate(records):
+        if isinstance(record, dict) and plan.fields is not None:
+            rows[i] = {}
+            active.append(i)
+            continue
+
+        try:
+            rows[i] = _translate(record, plan, 0, PathResolver(record), substitute)
+        except Exception as e:
+            errors[i] = e
+
+    resolvers = [PathResolver(records[i]) for i in active]
+
+    for node in plan.fields or ():
+        # records past the first failure would be discarded anyway
+        limit = next((i for i, e in enumerate(errors) if e), len(records))
+        keep = [k for k, i in enumerate(active) if i < limit]
+        active = [active[k] for k in keep]
+        resolvers = [resolvers[k] for k in keep]
+
+        column_errors: list[Exception | None] = [None] * len(active)
+        values = _translate_column(node, [records[i] for i in active], resolvers, substitute, column_errors)
+
+        for k, i in enumerate(active):
+            try:
+                if e := column_errors[k]:
+                    raise e
+                rows[i][node.name] = values[k]
+            except Exception as e:
+                errors[i] = column_errors[k] = e
+
+        keep = [k for k, e in enumerate(column_errors) if not e]
+        active = [active[k] for k in keep]
+        resolvers = [resolvers[k] for k in keep]
+
+    for e in errors:
+        if e:
+            raise e
+
+    return rows
+
+def translate_batch(
+    records: typing.Iterable[typing.Any],
+    mapping: Mapping | CompiledMapping,
+    substitute: dict[str, typing.Any] = {},
+    block_size: int = 256
+) -> list[typing.Any]:
+    """
+    Translates same-shaped records field by field instead of record by
+    record, `block_size` records at a time. Returns (or raises) exactly what
+    translating each record in turn would.
+    """
+    plan = mapping \
+        if isinstance(mapping, CompiledMapping) \
+        else compile_mapping(mapping)
+
+    it = iter(records)
+    rows: list[typing.Any] = []
+    while block := list(itertools.islice(it, block_size)):
+        rows.extend(_translate_block(block, plan, substitute))
+
+    return rows
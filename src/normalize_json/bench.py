@@ -0,0 +1,520 @@
+import argparse
+import typing
+import json
+import os
+import sys
+import time
+import mmap
+import random
+import functools
+import platform
+import tracemalloc
+import subprocess
+import tempfile
+from . import (
+    DocumentIndex,
+    Mapping,
+    CompiledMapping,
+    StringMapping,
+    translate,
+    translate_batch,
+    translate_string,
+    translate_strings,
+    compile_mapping,
+    compile_function,
+    compile_string_mapping,
+    flatten,
+    parse_projected,
+    source_paths,
+    unserialize,
+    Buffer,
+    open_writer,
+    translate_to,
+    OutputFormat,
+    JsonBackend,
+    JSON_BACKEND
+)
+
+Scenario = typing.NamedTuple('Scenario', [
+    ('name', str),
+    ('records', list[typing.Any]),
+    ('run', typing.Callable[[typing.Any], typing.Any]),
+    ('batch', bool)
+])
+
+Result = typing.TypedDict('Result', {
+    'name': str,
+    'records': int,
+    'records_per_sec': float,
+    'p50_us': float | None,
+    'p99_us': float | None,
+    'peak_kib': float
+})
+
+ColdStart = typing.TypedDict('ColdStart', {
+    'name': str,
+    'mappings': int,
+    'best_ms': float,
+    'p50_ms': float
+})
+
+def wide_records(count: int, width: int = 200, seed: int = 0):
+    rng = random.Random(seed)
+    records = [
+        {
+            'field_%d' % i: rng.choice([str(rng.randint(0, 10000)), rng.random(), 'value %d' % i])
+            for i in range(width)
+        }
+        for _ in range(count)
+    ]
+
+    mapping: Mapping = {
+        'modifiers': [
+            'enforce',
+            'default_null'
+        ],
+        '__fields': {
+            'out_%d' % i: {
+                'map': 'field_%d' % i,
+                'type': 'string'
+            }
+            for i in range(0, width, 10)
+        }
+    }
+
+    return records, mapping
+
+def numeric_records(count: int, width: int = 8, seed: int = 0):
+    rng = random.Random(seed)
+    records = [
+        {
+            'price_%d' % i: 'R$ %d.%02d' % (rng.randint(0, 99999), rng.randint(0, 99)) if i % 2 else str(rng.randint(0, 500))
+            for i in range(width)
+        }
+        for _ in range(count)
+    ]
+
+    mapping: Mapping = {
+        'modifiers': [
+            'enforce'
+        ],
+        '__fields': {
+            'out_%d' % i: {
+                'map': 'price_%d' % i,
+                'type': 'number' if i % 2 else 'integer'
+            }
+            for i in range(width)
+        }
+    }
+
+    return records, mapping
+
+def categorical_records(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    statuses = ['Pagamento Aprovado - %d' % i for i in range(12)]
+    countries = ['São Paulo', 'Região Sul', 'Paraná', 'Goiás', 'Ceará']
+    records = [
+        {
+            'status': rng.choice(statuses),
+            'region': rng.choice(countries),
+            'code': rng.choice('ABCDE')
+        }
+        for _ in range(count)
+    ]
+
+    mapping: Mapping = {
+        'modifiers': [
+            'normalize_unicode'
+        ],
+        '__fields': {
+            'status': {
+                'map': 'status',
+                'pick_until': ' - '
+            },
+            'region': {
+                'map': 'region',
+                'trim_end': 6
+            },
+            'code': {
+                'map': 'code',
+                'enum': { c: c.lower() for c in 'ABCDE' }
+            }
+        }
+    }
+
+    return records, mapping
+
+def deep_records(count: int, depth: int = 8, seed: int = 0):
+    rng = random.Random(seed)
+
+    def nested(level: int) -> typing.Any:
+        if level == depth:
+            return { 'value': str(rng.randint(0, 10000)), 'name': 'leaf' }
+        return { 'level_%d' % level: nested(level + 1), 'noise': list(range(10)) }
+
+    records = [nested(0) for _ in range(count)]
+    path = ''.join('.level_%d' % level for level in range(depth))
+
+    mapping: Mapping = {
+        'modifiers': [
+            'enforce'
+        ],
+        '__fields': {
+            'value': {
+                'map': path + '.value',
+                'type': 'integer'
+            },
+            'group': {
+                'type': 'object',
+                '__fields': {
+                    'name': {
+                        'map': path + '.name',
+                        'type': 'string'
+                    }
+                }
+            }
+        }
+    }
+
+    return records, mapping
+
+def array_records(count: int, items: int = 100, seed: int = 0):
+    rng = random.Random(seed)
+    records = [
+        {
+            'order': str(n),
+            'items': [
+                { 'sku': 'sku-%d' % i, 'quantity': str(rng.randint(1, 10)), 'price': '%.2f' % (rng.random() * 100) }
+                for i in range(items)
+            ]
+        }
+        for n in range(count)
+    ]
+
+    mapping: Mapping = {
+        'modifiers': [
+            'enforce'
+        ],
+        '__fields': {
+            'order': {
+                'type': 'integer'
+            },
+            'lines': {
+                'map': 'items',
+                'type': 'object',
+                'array': True,
+                '__fields': {
+                    'sku': {
+                        'map': '.items[].sku',
+                        'type': 'string',
+                        'pick_until': '-'
+                    },
+                    'quantity': {
+                        'map': 'quantity',
+                        'type': 'integer'
+                    },
+                    'price': {
+                        'map': 'price',
+                        'type': 'number'
+                    }
+                }
+            }
+        }
+    }
+
+    return records, mapping
+
+def string_records(count: int, synonyms: int = 2000, seed: int = 0):
+    rng = random.Random(seed)
+    mapping: StringMapping = {
+        '__fields': {
+            'key_%d' % k: ['synonym %d %d' % (k, i) for i in range(10)]
+            for k in range(synonyms // 10)
+        }
+    }
+
+    records = [
+        'synonym %d %d' % (rng.randrange(synonyms // 10), rng.randrange(10))
+        for _ in range(count)
+    ]
+
+    return records, mapping
+
+def example_pairs(directory: str):
+    i = 1
+    while os.path.exists(os.path.join(directory, 'mapping%d.json' % i)):
+        with open(os.path.join(directory, 'mapping%d.json' % i)) as fh:
+            mapping: Mapping = json.loads(fh.read())
+        with open(os.path.join(directory, 'sample%d.json' % i)) as fh:
+            sample = json.loads(fh.read())
+
+        yield 'example%d' % i, sample, mapping
+        i += 1
+
+def fan_out(record: typing.Any, mappings: list[Mapping], indexed: bool = False):
+    target = DocumentIndex(record) if indexed else record
+    return [translate(target, mapping) for mapping in mappings]
+
+def parse_translate(raw: Buffer, mapping: Mapping, paths: set[str] | None = None):
+    record = unserialize(raw) if paths is None else parse_projected(raw, paths)
+    return translate(record, mapping)
+
+def anonymous_mmap(raw: str) -> mmap.mmap:
+    # the CLI maps its input files, which parse_projected() reads in place
+    data = raw.encode()
+    buffer = mmap.mmap(-1, len(data))
+    buffer.write(data)
+    return buffer
+
+def write_collected(records: list[typing.Any], mapping: Mapping | CompiledMapping):
+    with open(os.devnull, 'w') as fh:
+        fh.write(json.dumps([translate(record, mapping) for record in records], indent=2))
+
+def write_streamed(records: list[typing.Any], mapping: Mapping | CompiledMapping, output_format: OutputFormat, backend: JsonBackend = 'json'):
+    with open(os.devnull, 'wb') as fh, open_writer(fh, output_format, backend=backend) as writer:
+        translate_to(writer, records, mapping)
+
+def scenarios(count: int, examples: str | None = None) -> list[Scenario]:
+    ret: list[Scenario] = []
+
+    for name, (records, mapping) in [
+        ('wide', wide_records(count)),
+        ('numeric', numeric_records(count)),
+        ('deep', deep_records(count)),
+        ('array', array_records(max(count // 10, 1)))
+    ]:
+        compiled = compile_mapping(mapping)
+        ret += [
+            Scenario('translate/%s' % name, records, functools.partial(translate, mapping=mapping), False),
+            Scenario('translate_compiled/%s' % name, records, functools.partial(translate, mapping=compiled), False),
+            Scenario('translate_codegen/%s' % name, records, compile_function(mapping), False),
+            Scenario('translate_batch/%s' % name, [records], functools.partial(translate_batch, mapping=compiled), True),
+            Scenario('flatten/%s' % name, records, flatten, False)
+        ]
+
+    # one record translated for several consumers, each reading the same paths
+    records, mapping = deep_records(count)
+    consumers: list[Mapping] = [
+        { **mapping, '__fields': { '%s_%d' % (name, i): node for name, node in mapping.get('__fields', {}).items() } }
+        for i in range(5)
+    ]
+    ret += [
+        Scenario('fan_out/plain', records, functools.partial(fan_out, mappings=consumers), False),
+        Scenario('fan_out/indexed', records, functools.partial(fan_out, mappings=consumers, indexed=True), False)
+    ]
+
+    # vendor payloads carrying blobs the mapping never reads
+    blobs = [{ **record, 'vendor': wide_records(20, seed=i)[0] } for i, record in enumerate(records[:max(count // 10, 1)])]
+    raw = [json.dumps(record) for record in blobs]
+    ret += [
+        Scenario('parse/full', raw, functools.partial(parse_translate, mapping=mapping), False),
+        Scenario('parse/projected', raw, functools.partial(parse_translate, mapping=mapping, paths=source_paths(mapping)), False)
+    ]
+
+    mapped = [anonymous_mmap(document) for document in raw]
+    ret += [
+        Scenario('parse_mmap/full', mapped, functools.partial(parse_translate, mapping=mapping), False),
+        Scenario('parse_mmap/projected', mapped, functools.partial(parse_translate, mapping=mapping, paths=source_paths(mapping)), False)
+    ]
+
+    # low-cardinality fields, memoized with a per-node cache
+    records, mapping = categorical_records(count)
+    memoized: Mapping = { **mapping, '__fields': { name: { **node, 'cache': 256 } for name, node in mapping.get('__fields', {}).items() } }
+    ret += [
+        Scenario('translate_compiled/categorical', records, functools.partial(translate, mapping=compile_mapping(mapping)), False),
+        Scenario('translate_memo/categorical', records, functools.partial(translate, mapping=compile_mapping(memoized)), False),
+        Scenario('translate_codegen/categorical', records, compile_function(mapping), False),
+        Scenario('codegen_memo/categorical', records, compile_function(memoized), False)
+    ]
+
+    # the whole output held as a list and dumped, against streamed writers
+    records, mapping = deep_records(count)
+    compiled = compile_mapping(mapping)
+    ret += [
+        Scenario('write/collected', [records], functools.partial(write_collected, mapping=compiled), True),
+        Scenario('write/ndjson', [records], functools.partial(write_streamed, mapping=compiled, output_format='ndjson'), True),
+        Scenario('write/csv', [records], functools.partial(write_streamed, mapping=compiled, output_format='csv'), True)
+    ]
+    if JSON_BACKEND != 'json':
+        ret.append(Scenario('write/ndjson_%s' % JSON_BACKEND, [records], functools.partial(write_streamed, mapping=compiled, output_format='ndjson', backend=JSON_BACKEND), True))
+
+    strings, string_mapping = string_records(count)
+    compiled_strings = compile_string_mapping(string_mapping)
+    ret += [
+        Scenario('translate_string/scan', strings, functools.partial(translate_string, mapping=string_mapping), False),
+        Scenario('translate_string/compiled', strings, functools.partial(translate_string, mapping=compiled_strings), False),
+        Scenario('translate_strings/compiled', [strings], functools.partial(translate_strings, mapping=compiled_strings), True)
+    ]
+
+    if examples and os.path.isdir(examples):
+        for name, sample, mapping in example_pairs(examples):
+            ret.append(Scenario('translate/%s' % name, [sample] * count, functools.partial(translate, mapping=mapping), False))
+
+    return ret
+
+def percentile(values: list[int], q: float):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] / 1000
+
+def measure(scenario: Scenario, repeat: int = 3) -> Result:
+    count = sum(len(r) for r in scenario.records) if scenario.batch else len(scenario.records)
+    best = float('inf')
+    latencies: list[int] = []
+
+    for _ in range(repeat):
+        timings: list[int] = []
+        start = time.perf_counter()
+        for record in scenario.records:
+            t = time.perf_counter_ns()
+            scenario.run(record)
+            timings.append(time.perf_counter_ns() - t)
+
+        if (elapsed := time.perf_counter() - start) < best:
+            best = elapsed
+            latencies = timings
+
+    # memory is sampled in a separate pass since tracemalloc skews timings
+    tracemalloc.start()
+    for record in scenario.records[:1000]:
+        scenario.run(record)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'name': scenario.name,
+        'records': count,
+        'records_per_sec': round(count / best, 1) if best else 0,
+        'p50_us': None if scenario.batch else percentile(latencies, .5),
+        'p99_us': None if scenario.batch else percentile(latencies, .99),
+        'peak_kib': round(peak / 1024, 1)
+    }
+
+def report(results: list[Result], fh: typing.IO[str] = sys.stdout):
+    fh.write('%-32s %10s %14s %10s %10s %10s\n' % ('scenario', 'records', 'records/s', 'p50 us', 'p99 us', 'peak KiB'))
+    for r in results:
+        fh.write('%-32s %10d %14.1f %10s %10s %10.1f\n' % (
+            r['name'],
+            r['records'],
+            r['records_per_sec'],
+            '-' if r['p50_us'] is None else '%.1f' % r['p50_us'],
+            '-' if r['p99_us'] is None else '%.1f' % r['p99_us'],
+            r['peak_kib']
+        ))
+
+COLD_START = """
+import sys, json, functools, importlib
+package = importlib.import_module(sys.argv[1])
+mode, cache_dir = sys.argv[2], sys.argv[3]
+
+with open(sys.argv[4]) as fh:
+    record = json.load(fh)
+
+for path in sys.argv[5:]:
+    if mode == 'cached':
+        fn = package.load_function(path, cache_dir)
+    else:
+        with open(path) as fh:
+            mapping = json.load(fh)
+        fn = package.compile_function(mapping) \\
+            if mode == 'codegen' \\
+            else functools.partial(package.translate, mapping=mapping)
+    fn(record)
+"""
+
+def cold_start(mappings: int = 24, repeat: int = 3) -> list[ColdStart]:
+    """
+    Times fresh interpreters from startup to the first record translated by
+    each of `mappings` mapping files, for the interpreter, generated code
+    and generated code loaded from a warm on-disk cache.
+    """
+    records, mapping = wide_records(1)
+    env = { **os.environ, 'PYTHONPATH': os.pathsep.join(p for p in sys.path if p) }
+    results: list[ColdStart] = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths: list[str] = []
+        for i in range(mappings):
+            paths.append(os.path.join(tmp, 'mapping%d.json' % i))
+            with open(paths[-1], 'w') as fh:
+                fh.write(json.dumps({ **mapping, '__fields': { '%s_%d' % (k, i): v for k, v in mapping['__fields'].items() } }))
+
+        sample = os.path.join(tmp, 'sample.json')
+        with open(sample, 'w') as fh:
+            fh.write(json.dumps(records[0]))
+
+        cache_dir = os.path.join(tmp, 'cache')
+        for mode in ['import', 'interpreter', 'codegen', 'cached']:
+            args = [sys.executable, '-c', COLD_START, __package__ or 'normalize_json', mode, cache_dir, sample]
+            if mode != 'import':
+                args += paths
+            if mode == 'cached':
+                subprocess.run(args, env=env, check=True)
+
+            timings: list[int] = []
+            for _ in range(repeat):
+                t = time.perf_counter_ns()
+                subprocess.run(args, env=env, check=True)
+                timings.append(time.perf_counter_ns() - t)
+
+            results.append({
+                'name': 'cold_start/%s' % mode,
+                'mappings': 0 if mode == 'import' else mappings,
+                'best_ms': round(min(timings) / 1e6, 1),
+                'p50_ms': round(percentile(timings, .5) / 1000, 1)
+            })
+
+    return results
+
+def report_cold_start(results: list[ColdStart], fh: typing.IO[str] = sys.stdout):
+    fh.write('%-32s %10s %10s %10s\n' % ('scenario', 'mappings', 'best ms', 'p50 ms'))
+    for r in results:
+        fh.write('%-32s %10d %10.1f %10.1f\n' % (r['name'], r['mappings'], r['best_ms'], r['p50_ms']))
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog='normalize_json.bench',
+        description='translate, flatten and translate_string benchmarks'
+    )
+
+    parser.add_argument('-n', '--records', type=int, default=1000)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('-k', '--filter', help='only run scenarios whose name contains this string')
+    parser.add_argument('--examples', default='examples', help='directory with mappingN.json/sampleN.json pairs')
+    parser.add_argument('--json', help='write machine-readable results to this file (- for stdout)')
+    parser.add_argument('--cold-start', type=int, metavar='MAPPINGS', help='instead, time fresh processes loading this many mappings, with and without the on-disk cache')
+
+    args = parser.parse_args(argv)
+    results: list[Result] | list[ColdStart] = cold_start(args.cold_start, args.repeat) if args.cold_start else [
+        measure(scenario, args.repeat)
+        for scenario in scenarios(args.records, args.examples)
+        if not args.filter or args.filter in scenario.name
+    ]
+
+    if args.json:
+        try:
+            from importlib.metadata import version
+            library_version = version('normalize_json')
+        except Exception:
+            library_version = None
+
+        payload = {
+            'version': library_version,
+            'python': platform.python_version(),
+            'timestamp': time.time(),
+            'results': results
+        }
+
+        if args.json == '-':
+            print(json.dumps(payload, indent=2))
+            return
+
+        with open(args.json, 'w') as fh:
+            fh.write(json.dumps(payload, indent=2))
+
+    if args.cold_start:
+        report_cold_start(typing.cast(list[ColdStart], results))
+    else:
+        report(typing.cast(list[Result], results))
+
+if __name__ == '__main__':
+    main()
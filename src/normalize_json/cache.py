@@ -0,0 +1,123 @@
+import typing
+import os
+import sys
+import json
+import marshal
+import hashlib
+import functools
+import types
+from importlib import metadata
+from . import normalize, codegen
+from .normalize import (
+    Mapping,
+    CompiledMapping,
+    compile_mapping,
+    validate_mapping,
+    value_cache_size
+)
+from .codegen import (
+    TranslateFunction,
+    compile_source,
+    generate_source,
+    make_function
+)
+
+# bumped when the generated code's helpers (_check_types(), _enforce(), the
+# resolver API) change, the generator_digest() covers source checkouts
+CACHE_FORMAT = 2
+
+CachedMapping = typing.NamedTuple('CachedMapping', [
+    ('mapping', Mapping),
+    ('source', str),
+    ('code', types.CodeType)
+])
+
+@functools.cache
+def library_version() -> str:
+    try:
+        return metadata.version('normalize_json')
+    except metadata.PackageNotFoundError:
+        return 'dev'
+
+@functools.cache
+def generator_digest() -> str:
+    """
+    Hash of the modules generating the code and providing the helpers it
+    calls, which changes with them even where the library version doesn't
+    (editable installs, source checkouts).
+    """
+    digest = hashlib.sha256()
+    try:
+        for path in (codegen.__file__, normalize.__file__):
+            with open(path, 'rb') as fh:
+                digest.update(fh.read())
+    except OSError:
+        return 'unknown'
+
+    return digest.hexdigest()[:12]
+
+def cache_directory(root: str | None = None) -> str:
+    """
+    Entries live under a directory named after the library version, the
+    interpreter's bytecode tag and the code generator, so upgrading any of
+    them never reads stale code.
+    """
+    root = root \
+        or os.environ.get('NORMALIZE_JSON_CACHE') \
+        or os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'normalize_json')
+
+    return os.path.join(root, '%s-%s-%d-%s' % (library_version(), sys.implementation.cache_tag, CACHE_FORMAT, generator_digest()))
+
+def _store(entry: str, cached: CachedMapping):
+    tmp = '%s.%d.tmp' % (entry, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        with open(tmp, 'wb') as fh:
+            marshal.dump(typing.cast(typing.Any, tuple(cached)), fh)
+        os.replace(tmp, entry)
+    except OSError:
+        # a read-only or full cache directory only costs the speedup
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def load_cached(path: str, cache_dir: str | None = None) -> CachedMapping:
+    """
+    Reads the mapping at `path` along with its generated code, from the
+    cache entry keyed by the file's content hash (and the value cache size
+    set with set_value_cache()) when there is one, or
+    validating, building and storing it otherwise. Editing the file changes
+    the key, so stale entries are never read.
+    """
+    with open(path, 'rb') as fh:
+        raw = fh.read()
+
+    # the generated code differs with the value caches set when it is built
+    entry = os.path.join(cache_directory(cache_dir), '%s-%d.bin' % (hashlib.sha256(raw).hexdigest(), value_cache_size()))
+
+    try:
+        with open(entry, 'rb') as fh:
+            return CachedMapping(*marshal.load(fh))
+    except FileNotFoundError:
+        pass
+    except (EOFError, ValueError, TypeError):
+        # truncated or foreign entries are rebuilt below
+        pass
+
+    mapping: Mapping = json.loads(raw)
+    validate_mapping(mapping)
+    source = generate_source(mapping)
+    cached = CachedMapping(mapping, source, compile_source(source))
+
+    _store(entry, cached)
+    return cached
+
+def load_mapping(path: str, cache_dir: str | None = None) -> CompiledMapping:
+    return compile_mapping(load_cached(path, cache_dir).mapping)
+
+def load_function(path: str, cache_dir: str | None = None) -> TranslateFunction:
+    """
+    Same as `compile_function(json.load(open(path)))`, minus the parsing
+    and code generation when the mapping is already cached.
+    """
+    mapping, source, code = load_cached(path, cache_dir)
+    return make_function(compile_mapping(mapping), code, source)
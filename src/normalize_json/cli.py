@@ -1,8 +1,15 @@
 import argparse
 import typing
 import sys
+import os
+import glob
 import json
-from . import translate, flatten, RawObject, Mapping
+import mmap
+import hashlib
+import time
+import contextlib
+import concurrent.futures
+from . import parse_projected, source_paths, translate, translate_to, write_to, open_writer, flatten, compile_mapping, validate_mapping, unserialize, iter_records, InputFormat, OutputFormat, RawObject, Mapping, CompiledMapping, RecordError, MappingError, JSON_BACKEND
 
 CliOptions = typing.TypedDict('CliOptions', {
     'target': str,
@@ -10,35 +17,378 @@ CliOptions = typing.TypedDict('CliOptions', {
     'op': typing.Literal[
         'translate',
         'flatten'
-    ]
+    ],
+    'format': typing.NotRequired[InputFormat],
+    'workers': typing.NotRequired[int],
+    'project': typing.NotRequired[bool],
+    'output': typing.NotRequired[OutputFormat],
+    'csv_extra': typing.NotRequired[typing.Literal['error', 'ignore']],
+    'output_dir': typing.NotRequired[str | None],
+    'jobs': typing.NotRequired[int]
+})
+
+FileResult = typing.TypedDict('FileResult', {
+    'target': str,
+    'output': str,
+    'size': int,
+    'mtime': float,
+    'status': typing.Literal[
+        'done',
+        'failed'
+    ],
+    'records': int,
+    'errors': int,
+    'seconds': float,
+    'config': typing.NotRequired[str],
+    'error': typing.NotRequired[str]
 })
 
-def output(obj: RawObject):
-    print(json.dumps(obj, indent=2))
+MANIFEST = 'manifest.ndjson'
+
+EXTENSIONS: dict[str, str] = {
+    'json': '.json',
+    'ndjson': '.ndjson',
+    'array': '.json',
+    'csv': '.csv'
+}
+
+def output(obj: RawObject, fh: typing.IO[bytes] | None = None):
+    if fh is None:
+        print(json.dumps(obj, indent=2))
+        return
+
+    fh.write(json.dumps(obj, indent=2).encode() + b'\n')
+
+def open_target(target: str) -> typing.IO[str]:
+    if target == '-':
+        return sys.stdin
+    return open(target)
+
+@contextlib.contextmanager
+def open_buffer(target: str) -> typing.Generator[bytes | mmap.mmap, None, None]:
+    """
+    Memory-maps `target` so it is parsed without a decoded copy of the file
+    in memory. Stdin and empty files (which can't be mapped) are read.
+    """
+    if target == '-':
+        yield sys.stdin.buffer.read()
+        return
+
+    with open(target, 'rb') as fh:
+        try:
+            buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield fh.read()
+            return
+
+        with buffer:
+            yield buffer
+
+@contextlib.contextmanager
+def open_records(target: str, input_format: InputFormat) -> typing.Generator[typing.Iterator[typing.Any], None, None]:
+    if input_format == 'ndjson' and target != '-':
+        with open_buffer(target) as buffer:
+            yield unserialize(buffer, 'application/x-ndjson')
+        return
+
+    with open_target(target) as fh:
+        yield iter_records(fh, input_format)
+
+def process(target: str, fh: typing.IO[bytes] | None, options: CliOptions, plan: CompiledMapping | None) -> tuple[int, list[RecordError]]:
+    """
+    Runs the operation over one input, writing to `fh` (stdout when None).
+    Returns the number of records read and the errors of those that failed.
+    """
+    input_format = options.get('format') or 'json'
+
+    if input_format != 'json':
+        errors: list[RecordError] = []
+        output_format = options.get('output') or 'ndjson'
+        writer_options: dict[str, typing.Any] = { 'backend': JSON_BACKEND }
+        if output_format == 'csv':
+            writer_options['extrasaction'] = 'ignore' if options.get('csv_extra') == 'ignore' else 'raise'
+
+        with open_records(target, input_format) as records, \
+            open_writer(fh or sys.stdout.buffer, output_format, **writer_options) as writer:
+            match options['op']:
+                case 'translate':
+                    workers = options.get('workers') or 1
+                    errors = translate_to(
+                        writer,
+                        records,
+                        typing.cast(CompiledMapping, plan),
+                        workers=workers,
+                        chunk_size=1000 if workers > 1 else 1
+                    )
+                case 'flatten':
+                    # CSV columns are flattened paths already
+                    errors = write_to(writer, records if output_format == 'csv' else map(flatten, records))
+
+        return writer.records + len(errors), errors
+
+    with open_buffer(target) as buffer:
+        document = parse_projected(buffer, source_paths(typing.cast(CompiledMapping, plan))) \
+            if options.get('project') and options['op'] == 'translate' \
+            else unserialize(buffer)
+
+    match options['op']:
+        case 'translate':
+            result = translate(document, typing.cast(CompiledMapping, plan))
+        case 'flatten':
+            result = flatten(document)
+
+    output(result, fh)
+    return len(typing.cast(list[typing.Any], result)) if isinstance(result, list) else 1, []
+
+def expand_targets(target: str, exclude: str | None = None) -> list[str]:
+    """
+    A directory expands to the files under it and a glob to the files it
+    matches (** included), in sorted order. Files under `exclude` are left
+    out so outputs written inside the input directory aren't read back.
+    An existing file is taken as is, glob characters in its name included.
+    Raises a ValueError when nothing is left.
+    """
+    if os.path.isfile(target):
+        return [target]
+
+    paths = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(target)
+        for name in names
+    ] if os.path.isdir(target) else glob.glob(target, recursive=True)
+
+    exclude = os.path.abspath(exclude) + os.sep if exclude else None
+    ret = sorted(
+        path for path in paths
+        if os.path.isfile(path) and not (exclude and os.path.abspath(path).startswith(exclude))
+    )
+
+    if not ret:
+        raise ValueError('no files match %s' % target)
+    return ret
+
+def output_paths(targets: list[str], output_dir: str, extension: str) -> dict[str, str]:
+    """
+    Outputs keep the layout of the inputs under their common directory,
+    with `extension` in place of theirs. Inputs that would be written to
+    the same output (a.json and a.ndjson, say), or over the manifest,
+    raise a ValueError.
+    """
+    base = os.path.commonpath([os.path.dirname(os.path.abspath(target)) for target in targets])
+    outputs = {
+        target: os.path.join(output_dir, os.path.splitext(os.path.relpath(os.path.abspath(target), base))[0] + extension)
+        for target in targets
+    }
+
+    seen: dict[str, str] = { os.path.abspath(os.path.join(output_dir, MANIFEST)): MANIFEST }
+    for target, path in outputs.items():
+        if (other := seen.setdefault(os.path.abspath(path), target)) != target:
+            raise ValueError('%s and %s would both be written to %s' % (other, target, path))
+
+    return outputs
+
+def config_digest(options: CliOptions, mapping: Mapping) -> str:
+    """
+    Hashes the mapping and the options that change what is written, so
+    outputs of a run with a different mapping or options aren't taken as
+    done.
+    """
+    config = [
+        mapping,
+        options['op'],
+        options.get('format') or 'json',
+        options.get('output') or 'ndjson',
+        options.get('csv_extra') or 'error',
+        bool(options.get('project'))
+    ]
+    return hashlib.sha256(json.dumps(config).encode()).hexdigest()
+
+def read_manifest(output_dir: str) -> dict[str, FileResult]:
+    """
+    Returns the last result recorded for each target of previous runs, by
+    absolute path. A line cut short by an interrupted run is ignored.
+    """
+    results: dict[str, FileResult] = {}
+    try:
+        with open(os.path.join(output_dir, MANIFEST)) as fh:
+            for line in fh:
+                try:
+                    result: FileResult = json.loads(line)
+                except ValueError:
+                    continue
+                results[os.path.abspath(result['target'])] = result
+    except FileNotFoundError:
+        pass
+
+    return results
+
+def is_done(target: str, output_path: str, config: str, previous: FileResult | None) -> bool:
+    if previous is None or previous['status'] != 'done':
+        return False
+    if previous.get('config') != config or previous['output'] != output_path or not os.path.exists(output_path):
+        return False
+
+    stat = os.stat(target)
+    return previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime
+
+_run_options: CliOptions | None = None
+_run_plan: CompiledMapping | None = None
+
+def _init_run(options: CliOptions, mapping: Mapping):
+    # the mapping is compiled once per process, not once per file
+    global _run_options, _run_plan
+    _run_options = options
+    _run_plan = compile_mapping(mapping) if mapping else None
+
+def run_file(target: str, output_path: str) -> FileResult:
+    options = typing.cast(CliOptions, _run_options)
+    stat = os.stat(target)
+    ret: FileResult = {
+        'target': target,
+        'output': output_path,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'status': 'done',
+        'records': 0,
+        'errors': 0,
+        'seconds': 0.0
+    }
+
+    # written aside and moved in place, so an output is never left half done
+    tmp = '%s.%d.tmp' % (output_path, os.getpid())
+    start = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(tmp, 'wb') as fh:
+            ret['records'], errors = process(target, fh, options, _run_plan)
+        os.replace(tmp, output_path)
+        ret['errors'] = len(errors)
+        if errors:
+            ret['error'] = 'record %d: %s' % errors[0]
+    except Exception as e:
+        ret['status'] = 'failed'
+        ret['error'] = '%s: %s' % (e.__class__.__name__, e)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    ret['seconds'] = round(time.perf_counter() - start, 6)
+    return ret
+
+def run(targets: list[str], options: CliOptions, mapping: Mapping) -> tuple[list[FileResult], int]:
+    """
+    Processes every target into --output-dir, across --jobs processes.
+    Each finished file is appended to the manifest there, and files it
+    records as done (unchanged since, with the same mapping and options,
+    and with their output still there) are skipped, so an interrupted run
+    picks up where it stopped. Returns this run's results and the number
+    of files skipped.
+    """
+    output_dir = typing.cast(str, options.get('output_dir'))
+    os.makedirs(output_dir, exist_ok=True)
+
+    input_format = options.get('format') or 'json'
+    extension = EXTENSIONS[input_format if input_format == 'json' else options.get('output') or 'ndjson']
+    outputs = output_paths(targets, output_dir, extension) if targets else {}
+
+    config = config_digest(options, mapping)
+    previous = read_manifest(output_dir)
+    pending = [
+        target for target in targets
+        if not is_done(target, outputs[target], config, previous.get(os.path.abspath(target)))
+    ]
+    results: list[FileResult] = []
+
+    with open(os.path.join(output_dir, MANIFEST), 'a') as manifest:
+        def record(result: FileResult):
+            result['config'] = config
+            results.append(result)
+            manifest.write(json.dumps(result) + '\n')
+            manifest.flush()
+
+        jobs = options.get('jobs') or 1
+        if jobs <= 1:
+            _init_run(options, mapping)
+            for target in pending:
+                record(run_file(target, outputs[target]))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_init_run,
+                initargs=(options, mapping)
+            ) as executor:
+                futures = [executor.submit(run_file, target, outputs[target]) for target in pending]
+                for future in concurrent.futures.as_completed(futures):
+                    record(future.result())
+
+    return results, len(targets) - len(pending)
+
+def report(results: list[FileResult], skipped: int, elapsed: float, fh: typing.IO[str] = sys.stderr):
+    fh.write('%-40s %10s %12s %8s %8s\n' % ('file', 'records', 'records/s', 'errors', 'status'))
+    for r in sorted(results, key=lambda r: r['target']):
+        fh.write('%-40s %10d %12.1f %8d %8s\n' % (
+            r['target'],
+            r['records'],
+            r['records'] / r['seconds'] if r['seconds'] else 0,
+            r['errors'],
+            r['status']
+        ))
+        if 'error' in r:
+            fh.write('  %s\n' % r['error'])
+
+    records = sum(r['records'] for r in results)
+    fh.write('%d files: %d done, %d failed, %d skipped as already done; %d records in %.2fs, %.1f records/s\n' % (
+        len(results) + skipped,
+        sum(r['status'] == 'done' for r in results),
+        sum(r['status'] == 'failed' for r in results),
+        skipped,
+        records,
+        elapsed,
+        records / elapsed if elapsed else 0
+    ))
 
 def main(options: CliOptions):
-    target: RawObject = {}
     mapping: Mapping = {}
 
-    with open(options['target']) as fh:
-        target = json.loads(fh.read())
-
     if options.get('mapping'):
         with open(typing.cast(str, options.get('mapping'))) as fh:
             mapping = json.loads(fh.read())
 
-    match options['op']:
-        case 'translate':
-            if not target:
-                print('mapping argument is required')
-                sys.exit(1)
+    if options['op'] == 'translate' and not mapping:
+        print('mapping argument is required')
+        sys.exit(1)
 
-            result = translate(target, mapping)
-            output(result)
+    if options['op'] == 'translate':
+        try:
+            validate_mapping(mapping)
+        except MappingError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
 
-        case 'flatten':
-            result = flatten(target)
-            output(result)
+    if output_dir := options.get('output_dir'):
+        start = time.perf_counter()
+        try:
+            results, skipped = run(expand_targets(options['target'], output_dir), options, mapping)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        report(results, skipped, time.perf_counter() - start)
+
+        if any(r['status'] == 'failed' or r['errors'] for r in results):
+            sys.exit(1)
+        return
+
+    # a file whose name has glob characters is still read as a file
+    target = options['target']
+    if os.path.isdir(target) or (not os.path.isfile(target) and glob.has_magic(target)):
+        print('--output-dir is required for a directory or glob target', file=sys.stderr)
+        sys.exit(1)
+
+    _, errors = process(options['target'], None, options, compile_mapping(mapping) if mapping else None)
+    for error in errors:
+        print('record %d: %s' % error, file=sys.stderr)
+
+    if errors:
+        sys.exit(1)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
@@ -46,12 +396,30 @@ if __name__ == '__main__':
         description='schematic JSON transformations'
     )
 
-    parser.add_argument('target')
+    parser.add_argument('target', help='input file, - for stdin, or with --output-dir a directory or glob')
     parser.add_argument('-m', '--mapping')
     parser.add_argument('--op', required=True, choices=[
         'translate',
         'flatten'
     ])
+    parser.add_argument('--format', default='json', choices=[
+        'json',
+        'ndjson',
+        'array'
+    ], help='json reads a single document, ndjson and array stream records and write them as --output')
+    parser.add_argument('--workers', type=int, default=1, help='processes used to translate streamed records')
+    parser.add_argument('--output', default='ndjson', choices=[
+        'ndjson',
+        'array',
+        'csv'
+    ], help='how streamed records are written: one compact JSON per line, a JSON array, or CSV with flattened paths as columns')
+    parser.add_argument('--csv-extra', default='error', choices=[
+        'error',
+        'ignore'
+    ], help='with --output csv, what to do with records with paths the first record lacks: report them as errors, or drop those paths')
+    parser.add_argument('--project', action='store_true', help='with --format json, only parse the parts of the input the mapping reads')
+    parser.add_argument('--output-dir', help='write one output per input file here, keeping a manifest so an interrupted run resumes')
+    parser.add_argument('--jobs', type=int, default=1, help='processes used to run input files in parallel with --output-dir')
 
     options = typing.cast(CliOptions, parser.parse_args().__dict__)
     main(options)
@@ -0,0 +1,333 @@
+# pyright: reportPrivateUsage=false
+# generated code calls the interpreter's private type check and casts
+import typing
+import hashlib
+import linecache
+import types
+import unicodedata
+from .normalize import Mapping, Modifier, CompiledMapping, CompiledNode, Alternative, PathResolver, DocumentIndex, compile_mapping, translate, value_cache_size, _check_types, _enforce, _profiler
+
+class _Codegen:
+    def __init__(self):
+        self.constants: list[str] = []
+        self.names: dict[str, str] = {}
+        self.functions: list[str] = []
+
+    def const(self, value: typing.Any, expr: str) -> str:
+        """
+        Inlines `value`, or binds it once at module level from `expr`, its
+        path in the plan, so the code object doesn't hold live references.
+        """
+        if value is None or type(value) in (str, int, bool):
+            return repr(value)
+
+        if (name := self.names.get(expr)) is None:
+            name = self.names[expr] = '_c%d' % len(self.names)
+            self.constants.append('%s = %s' % (name, expr))
+
+        return name
+
+    def name(self, alt: Alternative) -> str:
+        if alt.parts is None:
+            return repr(alt.name)
+        return ' + ix + '.join(repr(p) for p in alt.parts)
+
+    def lookup(self, node: CompiledNode, path: str):
+        """
+        Emits _lookup() for `node` with its alternatives unrolled. Returns
+        the lines, the alternative a miss ends at and whether the node may
+        resolve to a {{ variable }}.
+        """
+        alternatives: list[Alternative] = []
+        for alt in node.alternatives:
+            alternatives.append(alt)
+            if not alt.is_path and alt.is_var:
+                break
+
+        last = alternatives[-1]
+        has_var = not last.is_path and last.is_var
+
+        if not has_var and not any(alt.is_path for alt in alternatives):
+            gets = ' or '.join('target.get(%s)' % self.name(alt) for alt in alternatives)
+            return ['v = %s or None' % gets], last, False
+
+        lines = ['var = None'] if has_var else []
+        lines.append('while True:')
+
+        for i, alt in enumerate(alternatives):
+            name = self.name(alt)
+            if alt.parts is not None:
+                lines.append('    mn = %s' % name)
+                name = 'mn'
+
+            lines.append('    if v := target.get(%s): break' % name)
+            if alt.is_path:
+                lines += [
+                    '    resolved = resolver.resolve(%s)' % name
+                        if alt.parts is None
+                        else '    resolved = resolver.resolve_template(mn, %s, target_index)' % self.const(alt, '%s.alternatives[%d]' % (path, i)),
+                    '    if v := resolved[0]: break',
+                    '    found, v = resolved[1]',
+                    '    if found and v != None: break'
+                ]
+            elif alt.is_var:
+                lines.append(
+                    "    var = mn[2:].replace(' ', '')[:-2]"
+                        if alt.parts is not None
+                        else '    var = %s' % repr(alt.name[2:].replace(' ', '')[:-2])
+                )
+
+        lines += [
+            '    v = None',
+            '    break'
+        ]
+
+        return lines, last, has_var
+
+    def modifiers(self, node: CompiledNode, path: str, n: str, miss: Alternative):
+        """
+        Emits the miss fallback, _handle_modifiers() and _finish() for a
+        leaf node, leaving the result in `v`.
+        """
+        rest: list[str] = []
+        if node.normalize_unicode:
+            rest += [
+                'if isinstance(v, str):',
+                "    v = unicodedata.normalize('NFKD', v)"
+            ]
+        if node.trim_start:
+            rest.append('v = v[%s*-1:]' % self.const(node.trim_start, path + '.trim_start'))
+        if node.trim_end:
+            rest.append('v = v[:%s]' % self.const(node.trim_end, path + '.trim_end'))
+        if node.pick_until:
+            rest.append('v = v.split(%s)[0]' % self.const(node.pick_until, path + '.pick_until'))
+        if node.enforce:
+            if node.accepted is not None:
+                rest.append('if v.__class__.__name__ not in %s: v = _enforce(%s, v)' % (self.const(node.accepted, path + '.accepted'), n))
+            else:
+                rest.append('if _check_types(%s, v): v = _enforce(%s, v)' % (n, n))
+
+        if miss.parts is None and miss.name:
+            fallback = '%s(%s)' % ('resolver.get' if miss.name[0] == '.' else 'target.get', repr(miss.name))
+            missing = 'raise ValueError(%s)' % repr('value for %s wasnt provided' % miss.name)
+        else:
+            fallback = "resolver.get(mn) if mn[0] == '.' else target.get(mn)"
+            missing = "raise ValueError('value for %s wasnt provided' % mn)"
+
+        lines = [
+            'if v == None:',
+            *(['    mn = %s' % self.name(miss)] if 'mn' in fallback else []),
+            '    v = %s' % fallback
+        ]
+
+        if node.memo is not None:
+            return lines + ['v = %s(%s, %s, v)' % (self.const(node.memo, path + '.memo'), n, self.name(miss))]
+
+        if node.has_default:
+            lines += [
+                'if v == None:',
+                '    v = %s' % self.const(node.default, path + '.default'),
+                *rest
+            ]
+        elif node.default_null:
+            lines += [
+                'if v == None:',
+                '    v = None',
+                *(['else:', *('    ' + line for line in rest)] if rest else [])
+            ]
+        else:
+            lines += [
+                'if v == None:',
+                '    ' + missing,
+                *rest
+            ]
+
+        if node.array:
+            lines += [
+                'if not isinstance(v, list):',
+                '    v = [v]'
+            ]
+
+        if node.accepted is not None:
+            if not node.default:
+                lines += [
+                    'if v.__class__.__name__ not in %s:' % self.const(node.accepted, path + '.accepted'),
+                    '    raise ValueError(\'check_types @ %%s (got "%%s", expected "%%s")\' %% (%s, v.__class__.__name__, %s))' % (
+                        repr(node.name),
+                        repr(node.type)
+                    )
+                ]
+        elif node.default:
+            lines.append('_check_types(%s, v)' % n)
+        else:
+            lines += [
+                'if err := _check_types(%s, v):' % n,
+                '    raise ValueError(\'check_types @ %%s (got "%%s", expected "%%s")\' %% (%s, *err))' % repr(node.name)
+            ]
+
+        if node.enum:
+            enum, default = self.const(node.enum, path + '.enum'), self.const(node.default, path + '.default')
+            lines.append('if v != None:')
+            if node.array:
+                lines += [
+                    '    if not isinstance(v, list):',
+                    '        raise TypeError()',
+                    '    v = [%s.get(e, %s) for e in v]' % (enum, default)
+                ]
+            else:
+                lines.append('    v = %s.get(v, %s)' % (enum, default))
+
+        return lines
+
+    def field(self, node: CompiledNode, path: str):
+        output = 'ret[%s]' % repr(node.name)
+
+        if node.mapping is not None:
+            child = self.mapping(node.mapping, path + '.mapping')
+            wrap = [
+                'if not isinstance(%s, list):' % output,
+                '    %s = [%s]' % (output, output)
+            ] if node.array else []
+
+            if not node.mapped and not any(alt.is_var for alt in node.alternatives):
+                return [
+                    '%s = %s(target, 0, resolver.scope(target), substitute)' % (output, child),
+                    *wrap
+                ]
+
+            lines, _, has_var = self.lookup(node, path)
+            body = [
+                '%s = %s(v if v or isinstance(v, list) else target[%s], 0, resolver, substitute)' % (output, child, repr(node.name))
+                    if node.mapped
+                    else '%s = %s(target, 0, resolver.scope(target), substitute)' % (output, child),
+                *wrap
+            ]
+        else:
+            lines, miss, has_var = self.lookup(node, path)
+            body = [
+                *self.modifiers(node, path, self.const(node, path), miss),
+                '%s = v' % output
+            ]
+
+        if not has_var:
+            return lines + body
+
+        return lines + [
+            'if var:',
+            '    %s = substitute.get(var)' % output,
+            'else:',
+            *('    ' + line for line in body)
+        ]
+
+    def mapping(self, plan: CompiledMapping, path: str = '_plan') -> str:
+        index = len(self.functions)
+        name = '_m%d' % index
+        self.functions.append('')
+
+        lines = [
+            'def %s(target, target_index, resolver, substitute):' % name,
+            '    if not isinstance(target, dict):',
+            '        if isinstance(target, list):',
+            '            return [%s(e, i, resolver, substitute) for i, e in enumerate(target)]' % name
+                if plan.array
+                else "            raise ValueError('illegal array')",
+            '        return {}'
+        ]
+
+        if plan.fields is None:
+            lines.append("    raise TypeError('__fields not present')")
+        else:
+            if any(alt.parts is not None for node in plan.fields for alt in node.alternatives):
+                lines.append("    ix = '[%d]' % target_index")
+
+            lines.append('    ret = {}')
+            for i, node in enumerate(plan.fields):
+                lines += ['    ' + line for line in self.field(node, '%s.fields[%d]' % (path, i))]
+            lines.append('    return ret')
+
+        self.functions[index] = '\n'.join(lines)
+        return name
+
+def _plan_digest(mapping: Mapping | CompiledMapping, inherited_modifiers: list[Modifier] | None):
+    # code generated with value caches calls them, so the setting a raw
+    # mapping is compiled with is part of the key
+    return hashlib.sha256(repr((mapping, inherited_modifiers, value_cache_size())).encode()).hexdigest()
+
+def generate_source(mapping: Mapping | CompiledMapping, inherited_modifiers: list[Modifier] | None = None) -> str:
+    """
+    Returns the Python source compile_function() builds for `mapping`. It
+    expects the compiled plan of the same mapping bound to `_plan`.
+    """
+    plan = mapping \
+        if isinstance(mapping, CompiledMapping) \
+        else compile_mapping(mapping, inherited_modifiers)
+
+    codegen = _Codegen()
+    codegen.mapping(plan)
+    return '\n'.join(codegen.constants) + '\n\n' + '\n\n'.join(codegen.functions) + '\n'
+
+def compile_source(source: str) -> types.CodeType:
+    return compile(source, '<normalize_json %s>' % hashlib.sha256(source.encode()).hexdigest()[:12], 'exec')
+
+TranslateFunction = typing.Callable[..., typing.Any]
+
+def make_function(plan: CompiledMapping, code: types.CodeType, source: str | None = None) -> TranslateFunction:
+    """
+    Binds `code`, compiled from generate_source(plan), into a translate
+    function. Passing `source` makes tracebacks show the generated lines.
+    """
+    if source is not None:
+        linecache.cache[code.co_filename] = (len(source), None, source.splitlines(True), code.co_filename)
+
+    namespace: dict[str, typing.Any] = {
+        '_plan': plan,
+        'unicodedata': unicodedata,
+        '_check_types': _check_types,
+        '_enforce': _enforce
+    }
+
+    exec(code, namespace)
+    root = namespace['_m0']
+
+    def fn(target: typing.Any, substitute: dict[str, typing.Any] = {}) -> typing.Any:
+        if _profiler.get() is not None:
+            return translate(target, plan, substitute=substitute)
+
+        target_index = 0
+        if isinstance(target, tuple):
+            target, target_index = typing.cast(tuple[typing.Any, int], target)
+
+        if isinstance(target, DocumentIndex):
+            return root(target.target, target_index, target, substitute)
+
+        return root(target, target_index, PathResolver(target), substitute)
+
+    return fn
+
+FUNCTION_CACHE_SIZE = 256
+
+_functions: dict[str, TranslateFunction] = {}
+
+def compile_function(mapping: Mapping | CompiledMapping, inherited_modifiers: list[Modifier] | None = None) -> TranslateFunction:
+    """
+    Generates a Python function with the lookups, modifiers and type checks
+    of every field of `mapping` unrolled and its constants inlined. Calling
+    `fn(target, substitute={})` returns the same as `translate(target,
+    mapping, substitute=substitute)`. Functions are cached by mapping hash.
+    """
+    digest = _plan_digest(mapping, inherited_modifiers)
+    if cached := _functions.get(digest):
+        return cached
+
+    plan = mapping \
+        if isinstance(mapping, CompiledMapping) \
+        else compile_mapping(mapping, inherited_modifiers)
+
+    source = generate_source(plan)
+    fn = make_function(plan, compile_source(source), source)
+
+    if len(_functions) >= FUNCTION_CACHE_SIZE:
+        del _functions[next(iter(_functions))]
+
+    _functions[digest] = fn
+    return fn
@@ -0,0 +1,201 @@
+# pyright: reportPrivateUsage=false
+# recomputes stale fields with the interpreter's private _translate()
+import typing
+import dataclasses
+from .normalize import Mapping, RawObject, CompiledMapping, CompiledNode, Alternative, PathResolver, PLAN_CACHE_SIZE, translate, _cached_plan, _translate
+
+class Delta(typing.NamedTuple):
+    output: typing.Any
+    changed: tuple[str, ...]
+
+Dependencies = typing.NamedTuple('Dependencies', [
+    ('keys', frozenset[str]),
+    ('prefixes', tuple[str, ...]),
+    ('variable', bool)
+])
+
+def _alternative_dependencies(alt: Alternative, keys: set[str], prefixes: list[str]):
+    # a "[]" template expands to keys/paths unknown until translation, so
+    # everything after the literal head is matched as a prefix
+    name = alt.name if alt.parts is None else alt.parts[0]
+
+    if alt.parts is None:
+        keys.add(name)
+    else:
+        prefixes.append(name)
+
+    if name[:1] == '.':
+        keys.update(
+            name[1:i]
+            for i in range(1, len(name) + 1)
+            if i == len(name) or name[i] in '.['
+        )
+        if alt.parts is not None:
+            prefixes.append(name[1:])
+
+def _node_dependencies(node: CompiledNode, keys: set[str], prefixes: list[str]) -> bool:
+    variable = False
+    for alt in node.alternatives:
+        variable = variable or (not alt.is_path and alt.is_var)
+        _alternative_dependencies(alt, keys, prefixes)
+
+    if node.mapping is not None:
+        if node.mapped:
+            if not isinstance(typing.cast(typing.Any, node.name), str):
+                # "reverse" with a list of names, always recomputed
+                return True
+            keys.add(node.name)
+        for child in node.mapping.fields or ():
+            variable = _node_dependencies(child, keys, prefixes) or variable
+
+    return variable
+
+def field_dependencies(mapping: Mapping | CompiledMapping) -> dict[str, Dependencies]:
+    """
+    Returns, per top-level output field, the top-level keys of a (dict)
+    record its translation may read: exact keys plus key prefixes for "[]"
+    templates, and whether it also reads `substitute`. The sets are a
+    superset of what is actually read, never a subset.
+    """
+    plan = mapping \
+        if isinstance(mapping, CompiledMapping) \
+        else _cached_plan(mapping, None)
+
+    ret: dict[str, Dependencies] = {}
+    for node in plan.fields or ():
+        keys: set[str] = set()
+        prefixes: list[str] = []
+        variable = _node_dependencies(node, keys, prefixes)
+        ret[node.name] = Dependencies(frozenset(keys), tuple(dict.fromkeys(prefixes)), variable)
+
+    return ret
+
+_MISSING = object()
+
+def _same(a: typing.Any, b: typing.Any) -> bool:
+    # stricter than ==, which takes 1 == 1.0 == True and ignores key order,
+    # both of which can change a translation
+    stack = [(a, b)]
+    while stack:
+        a, b = stack.pop()
+        if a is b:
+            continue
+        if type(a) is not type(b):
+            return False
+
+        if isinstance(a, dict):
+            a, b = typing.cast(RawObject, a), typing.cast(RawObject, b)
+            if list(a) != list(b):
+                return False
+            stack.extend((a[k], b[k]) for k in a)
+        elif isinstance(a, list):
+            a, b = typing.cast(list[typing.Any], a), typing.cast(list[typing.Any], b)
+            if len(a) != len(b):
+                return False
+            stack.extend(zip(a, b))
+        elif a != b:
+            return False
+
+    return True
+
+_dependencies: dict[int, tuple[CompiledMapping, dict[str, Dependencies], frozenset[str], tuple[str, ...]]] = {}
+
+def translate_delta(
+    previous_source: typing.Any,
+    previous_output: typing.Any,
+    source: typing.Any,
+    mapping: Mapping | CompiledMapping,
+    substitute: dict[str, typing.Any] = {}
+) -> Delta:
+    """
+    Translates `source` given the record it replaces and that record's
+    translation, recomputing only the top-level output fields that read a
+    top-level key which changed (or a substitute). Returns the output, equal
+    to translate(source, mapping), and the names of the fields whose value
+    changed.
+    """
+    plan = mapping \
+        if isinstance(mapping, CompiledMapping) \
+        else _cached_plan(mapping, None)
+
+    fields = plan.fields or ()
+    names = [node.name for node in fields]
+
+    incremental = isinstance(previous_source, dict) \
+        and isinstance(source, dict) \
+        and isinstance(previous_output, dict) \
+        and plan.fields is not None \
+        and all(isinstance(typing.cast(typing.Any, name), str) for name in names) \
+        and len(set(names)) == len(names)
+
+    if incremental:
+        previous_source, source = typing.cast(RawObject, previous_source), typing.cast(RawObject, source)
+        previous_output = typing.cast(RawObject, previous_output)
+
+        # ambiguous dotted paths resolve by key order, so reordered records
+        # are translated in full
+        incremental = list(previous_source) == list(source) \
+            or [k for k in previous_source if k in source] == [k for k in source if k in previous_source]
+
+    if not incremental:
+        output: typing.Any = translate(typing.cast(typing.Any, source), plan, substitute=substitute)
+        if not isinstance(output, dict) or not isinstance(previous_output, dict):
+            return Delta(output, tuple(names) if not _same(output, previous_output) else ())
+
+        output, previous_output = typing.cast(RawObject, output), typing.cast(RawObject, previous_output)
+        return Delta(output, tuple(
+            name for name in output
+            if not _same(output[name], previous_output.get(name, _MISSING))
+        ))
+
+    previous_source, source = typing.cast(RawObject, previous_source), typing.cast(RawObject, source)
+    previous_output = typing.cast(RawObject, previous_output)
+
+    cached = _dependencies.get(id(plan))
+    if cached is None or cached[0] is not plan:
+        if len(_dependencies) >= PLAN_CACHE_SIZE:
+            del _dependencies[next(iter(_dependencies))]
+
+        dependencies = field_dependencies(plan)
+        cached = _dependencies[id(plan)] = (
+            plan,
+            dependencies,
+            frozenset(k for deps in dependencies.values() for k in deps.keys),
+            tuple(p for deps in dependencies.values() for p in deps.prefixes)
+        )
+
+    _, dependencies, keys, prefixes = cached
+
+    # keys no field reads can't change the output
+    candidates = keys \
+        if not prefixes \
+        else [k for k in previous_source.keys() | source.keys() if k in keys or k.startswith(prefixes)]
+
+    changed_keys: list[str] = []
+    for k in candidates:
+        a, b = previous_source.get(k, _MISSING), source.get(k, _MISSING)
+        if a is not b and not _same(a, b):
+            changed_keys.append(k)
+
+    stale = tuple(
+        node for node in fields
+        if node.name not in previous_output
+            or (deps := dependencies[node.name]).variable
+            or any(k in deps.keys or k.startswith(deps.prefixes) for k in changed_keys)
+    )
+
+    if not stale:
+        return Delta({ name: previous_output[name] for name in names }, ())
+
+    recomputed = typing.cast(RawObject, _translate(source, dataclasses.replace(plan, fields=stale), 0, PathResolver(source), substitute))
+
+    return Delta(
+        {
+            name: recomputed[name] if name in recomputed else previous_output[name]
+            for name in names
+        },
+        tuple(
+            node.name for node in stale
+            if not _same(recomputed[node.name], previous_output.get(node.name, _MISSING))
+        )
+    )
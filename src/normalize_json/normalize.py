@@ -3,6 +3,15 @@ import json
 import re
 import dateutil.parser as dateparser
 import unicodedata
+import functools
+import bisect
+import time
+import os
+import mmap
+import importlib
+import dataclasses
+import contextvars
+from datetime import datetime
 
 T = typing.TypeVar('T')
 
@@ -35,7 +44,8 @@ AcceptedType = typing.Literal[
 ]
 
 AcceptedMime = typing.Literal[
-    'application/json'
+    'application/json',
+    'application/x-ndjson'
 ]
 
 Node = typing.TypedDict('Node', {
@@ -48,6 +58,8 @@ Node = typing.TypedDict('Node', {
     'trim_end': int,
     'pick_until': str,
     'enum': dict[str, str],
+    'datetime_format': str,
+    'cache': int,
     '__fields': dict[str, 'Node']
 }, total=False)
 
@@ -63,43 +75,1053 @@ StringMapping = typing.TypedDict('StringMapping', {
 
 RawObject = dict[str, typing.Any]
 
-def unserialize(raw: typing.Any, mime: AcceptedMime = 'application/json'):
+JsonBackend = typing.Literal[
+    'orjson',
+    'msgspec',
+    'json'
+]
+
+Buffer = str | bytes | bytearray | memoryview | mmap.mmap
+
+def _stdlib_loads(raw: Buffer) -> typing.Any:
+    return json.loads(raw if isinstance(raw, str | bytes | bytearray) else bytes(raw))
+
+def _select_json_backend(preferred: str | None) -> tuple[JsonBackend, typing.Callable[[Buffer], typing.Any]]:
+    match preferred:
+        case None | 'json': return 'json', _stdlib_loads
+        case 'auto': names = ['orjson', 'msgspec']
+        case _: names = [preferred]
+
+    for name in names:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            continue
+
+        match name:
+            case 'orjson': return 'orjson', module.loads
+            case 'msgspec': return 'msgspec', module.json.Decoder().decode
+            case _: break
+
+    return 'json', _stdlib_loads
+
+# orjson and msgspec are opt-in (NORMALIZE_JSON_BACKEND=orjson, msgspec or
+# auto for whichever is installed): unlike json they turn integers past 64
+# bits into floats and reject NaN and Infinity
+JSON_BACKEND, _loads = _select_json_backend(os.environ.get('NORMALIZE_JSON_BACKEND'))
+
+_NDJSON_LINE = re.compile(rb'[^\n]+')
+_NDJSON_LINE_STR = re.compile(r'[^\n]+')
+
+def _iter_ndjson(raw: Buffer) -> typing.Iterator[typing.Any]:
+    if isinstance(raw, str | memoryview):
+        lines = _NDJSON_LINE_STR.finditer(raw) \
+            if isinstance(raw, str) \
+            else _NDJSON_LINE.finditer(raw)
+
+        for line in lines:
+            if not line.group().isspace():
+                yield _loads(line.group())
+        return
+
+    # find() instead of a regex scanner, which would keep an mmap from
+    # being closed while the iterator is alive
+    pos = 0
+    while pos < len(raw):
+        end = raw.find(b'\n', pos)
+        if end == -1:
+            end = len(raw)
+
+        line = raw[pos:end]
+        pos = end + 1
+        if line and not line.isspace():
+            yield _loads(line)
+
+def unserialize(raw: typing.Any, mime: AcceptedMime = 'application/json') -> typing.Any:
+    """
+    Parses `raw` (str, bytes, bytearray, memoryview or mmap) with the JSON
+    backend picked at import time. `application/x-ndjson` returns an
+    iterator yielding one record per line, read lazily from the buffer.
+    """
     match mime:
         case 'application/json':
-            if isinstance(raw, str): return json.loads(raw)
-            if isinstance(raw, bytes): return json.loads(raw)
+            if isinstance(raw, mmap.mmap):
+                with memoryview(raw) as view:
+                    return _loads(view)
+            if isinstance(raw, str | bytes | bytearray | memoryview): return _loads(typing.cast(Buffer, raw))
             else: return raw
+        case 'application/x-ndjson':
+            if isinstance(raw, str | bytes | bytearray | memoryview | mmap.mmap): return _iter_ndjson(typing.cast(Buffer, raw))
+            else: return iter(typing.cast(typing.Iterable[typing.Any], raw))
 
     raise TypeError('invalid mime')
 
+def iter_flatten(
+    target: typing.Any,
+    separator: str = '.',
+    preserve_arrays: bool = False,
+    max_depth: int | None = None,
+    prefix: str | None = None
+) -> typing.Iterator[tuple[str, typing.Any]]:
+    """
+    Yields the (path, value) pairs of flatten(target) lazily, in the same
+    order. Objects and arrays nested deeper than `max_depth` levels are
+    yielded whole, and with `prefix` only paths starting with it are
+    yielded, without walking subtrees that can't contain one.
+    """
+    if isinstance(target, dict):
+        items = iter(typing.cast(RawObject, target).items())
+    elif isinstance(target, list):
+        items = enumerate(typing.cast(list[typing.Any], target))
+    else:
+        return
+
+    # explicit stack of (children iterator, parent path, is object, depth)
+    stack: list[tuple[typing.Iterator[tuple[typing.Any, typing.Any]], str, bool, int]] = [
+        (items, '', isinstance(target, dict), 1)
+    ]
+
+    while stack:
+        items, parent, is_object, depth = stack[-1]
+
+        for k, v in items:
+            path = f'{parent}{separator}{k}' if is_object else f'{parent}[{k}]'
+
+            if isinstance(v, (dict, list)) and (max_depth is None or depth < max_depth):
+                if prefix and not path.startswith(prefix) and not prefix.startswith(path):
+                    continue
+
+                if isinstance(v, dict):
+                    stack.append((iter(typing.cast(RawObject, v).items()), path, True, depth + 1))
+                    break
+
+                if not preserve_arrays:
+                    stack.append((enumerate(typing.cast(list[typing.Any], v)), path, False, depth + 1))
+                    break
+
+                v = [
+                    flatten(elem, separator, preserve_arrays)
+                    for elem in typing.cast(list[typing.Any], v)
+                ]
+
+            if not prefix or path.startswith(prefix):
+                yield path, v
+        else:
+            stack.pop()
+
 def flatten(target: typing.Any, separator: str = '.', preserve_arrays: bool = False):
     if not isinstance(target, dict) and not isinstance(target, list):
         return target
 
     ret: RawObject = {}
 
-    def internal_flatten(obj: typing.Any, parent: str = '', depth: int = 0) -> typing.Any:
-        if isinstance(obj, dict):
-            for k, v in typing.cast(RawObject, obj).items():
-                internal_flatten(v, '%s%s%s' % (parent, separator, k), depth + 1)
+    # same walk as iter_flatten(), minus the generator and filters
+    stack: list[tuple[typing.Iterator[tuple[typing.Any, typing.Any]], str, bool]] = [(
+        iter(typing.cast(RawObject, target).items())
+            if isinstance(target, dict)
+            else enumerate(typing.cast(list[typing.Any], target)),
+        '',
+        isinstance(target, dict)
+    )]
 
-        elif isinstance(obj, list):
-            if preserve_arrays and depth > 0:
-                ret[parent] = [
+    while stack:
+        items, parent, is_object = stack[-1]
+
+        for k, v in items:
+            path = f'{parent}{separator}{k}' if is_object else f'{parent}[{k}]'
+
+            if isinstance(v, dict):
+                stack.append((iter(typing.cast(RawObject, v).items()), path, True))
+                break
+
+            if isinstance(v, list):
+                if not preserve_arrays:
+                    stack.append((enumerate(typing.cast(list[typing.Any], v)), path, False))
+                    break
+
+                v = [
                     flatten(elem, separator, preserve_arrays)
-                    for elem in typing.cast(list[typing.Any], obj)
+                    for elem in typing.cast(list[typing.Any], v)
                 ]
+
+            ret[path] = v
+        else:
+            stack.pop()
+
+    return ret
+
+Route = tuple[tuple[typing.Any, typing.Any], ...]
+
+# the flat value at a path, and whether there's one with arrays preserved
+Resolved = tuple[typing.Any, tuple[bool, typing.Any]]
+
+@functools.lru_cache(maxsize=4096)
+def _separators(path: str):
+    return tuple(i for i, c in enumerate(path) if c in '.[') + (len(path),)
+
+class PathResolver:
+    """
+    Resolves flatten()-style paths (".a.b", "[0].a", ".a[1].b") against a
+    document on demand, walking only the paths that are asked for. get() and
+    get_preserved() match lookups on flatten(target) and
+    flatten(target, preserve_arrays=True) respectively.
+    """
+
+    __slots__ = ('target', '_cache', '_scopes', '_bases')
+
+    def __init__(self, target: typing.Any):
+        self.target = target
+        self._cache: dict[str, Resolved] = {}
+        self._scopes: dict[int, PathResolver] | None = None
+        self._bases: dict[str, tuple[typing.Any, int, bool] | None] | None = None
+
+    def scope(self, target: typing.Any) -> 'PathResolver':
+        """
+        Returns the resolver rooted at `target`, sharing it with every other
+        sub-translation of the same record that is rooted there.
+        """
+        if target is self.target:
+            return self
+
+        if self._scopes is None:
+            self._scopes = { id(self.target): self }
+
+        if (resolver := self._scopes.get(id(target))) is None:
+            resolver = self._scopes[id(target)] = PathResolver(target)
+            resolver._scopes = self._scopes
+
+        return resolver
+
+    def _walk(
+        self,
+        obj: typing.Any,
+        path: str,
+        pos: int,
+        depth: int,
+        crossed: bool,
+        route: Route
+    ) -> typing.Iterator[tuple[typing.Any, int, bool, Route]]:
+        if pos == len(path):
+            yield obj, depth, crossed, route
+            return
+
+        if isinstance(obj, dict):
+            if path[pos] != '.':
                 return
 
-            for i, v in enumerate(typing.cast(list[RawObject], obj)):
-                internal_flatten(v, '%s[%d]' % (parent, i), depth + 1)
+            obj = typing.cast(RawObject, obj)
+            end = pos + 1
+            while True:
+                while end < len(path) and path[end] not in '.[':
+                    end += 1
+
+                key = path[pos+1:end]
+                if key in obj:
+                    yield from self._walk(obj[key], path, end, depth + 1, crossed, route + ((obj, key),))
+
+                if end == len(path):
+                    return
+
+                end += 1
+
+        elif isinstance(obj, list):
+            close = path.find(']', pos)
+            if path[pos] != '[' or close == -1:
+                return
+
+            index = path[pos+1:close]
+            obj = typing.cast(list[typing.Any], obj)
+            if not index.isdigit() or str(int(index)) != index or int(index) >= len(obj):
+                return
+
+            yield from self._walk(obj[int(index)], path, close + 1, depth + 1, crossed or depth > 0, route + ((obj, int(index)),))
+
+    def _walk_unique(
+        self,
+        obj: typing.Any,
+        path: str,
+        depth: int,
+        crossed: bool
+    ) -> list[tuple[typing.Any, int, bool, Route]] | None:
+        # greedy walk for the common case, returns None when some dict on the
+        # way has a key spanning several path segments and _walk() is needed
+        separators = _separators(path)
+        if separators[0] != 0:
+            return []
+
+        k = 0
+
+        while True:
+            pos = separators[k]
+            if pos == len(path):
+                return [(obj, depth, crossed, ())]
+
+            if isinstance(obj, dict):
+                obj = typing.cast(RawObject, obj)
+                if path[pos] != '.':
+                    return []
+
+                for end in separators[k+2:]:
+                    if path[pos+1:end] in obj:
+                        return None
+
+                key = path[pos+1:separators[k+1]]
+                if key not in obj:
+                    return []
+
+                obj = obj[key]
+                k += 1
+
+            elif isinstance(obj, list):
+                close = path.find(']', pos)
+                if path[pos] != '[' or close == -1:
+                    return []
+
+                index = path[pos+1:close]
+                obj = typing.cast(list[typing.Any], obj)
+                if not index.isdigit() or str(int(index)) != index or int(index) >= len(obj):
+                    return []
+
+                k = bisect.bisect_left(separators, close + 1)
+                if separators[k] != close + 1:
+                    return []
+
+                crossed = crossed or depth > 0
+                obj = obj[int(index)]
+
+            else:
+                return []
+
+            depth += 1
+
+    @staticmethod
+    def _order(route: Route):
+        # flatten() writes keys depth-first, so when distinct routes spell the
+        # same path (keys containing "." or "[") the last one visited wins
+        return tuple(
+            list(typing.cast(RawObject, obj)).index(key) if isinstance(obj, dict) else key
+            for obj, key in route
+        )
+
+    def resolve(self, path: str) -> 'Resolved':
+        if path in self._cache:
+            return self._cache[path]
+
+        ret = self._cache[path] = self._resolve_at(self.target, path, 0, False) \
+            if path \
+            else (None, (False, None))
+
+        return ret
 
+    def _resolve_at(self, obj: typing.Any, path: str, depth: int, crossed: bool) -> 'Resolved':
+        flat: list[tuple[typing.Any, Route]] = []
+        preserved: list[tuple[typing.Any, Route]] = []
+
+        routes = self._walk_unique(obj, path, depth, crossed)
+        if routes is None:
+            routes = self._walk(obj, path, 0, depth, crossed, ())
+
+        for value, depth, crossed, route in routes:
+            if isinstance(value, dict):
+                continue
+
+            if isinstance(value, list):
+                if not crossed and depth > 0:
+                    preserved.append((typing.cast(list[typing.Any], value), route))
+                continue
+
+            flat.append((value, route))
+            if not crossed:
+                preserved.append((value, route))
+
+        if len(flat) > 1:
+            flat.sort(key=lambda found: self._order(found[1]))
+        if len(preserved) > 1:
+            preserved.sort(key=lambda found: self._order(found[1]))
+
+        ret = (
+            flat[-1][0] if flat else None,
+            (True, preserved[-1][0]) if preserved else (False, None)
+        )
+
+        found, value = ret[1]
+        if found and isinstance(value, list):
+            ret = ret[0], (True, [
+                flatten(elem, preserve_arrays=True)
+                for elem in typing.cast(list[typing.Any], value)
+            ])
+
+        return ret
+
+    def _base(self, head: str) -> tuple[typing.Any, int, bool] | None:
+        # walks `head` the way _walk_unique() walks `head[i]tail`, returning
+        # the list it ends at, or None when the full path could take
+        # another route (a key spanning into "[i]tail") or ends nowhere
+        separators = _separators(head)
+        obj = self.target
+        depth = 0
+        crossed = False
+        k = 0
+
+        while True:
+            pos = separators[k]
+            if pos == len(head):
+                return (typing.cast(typing.Any, obj), depth, crossed) if isinstance(obj, list) else None
+
+            if isinstance(obj, dict):
+                obj = typing.cast(RawObject, obj)
+                if head[pos] != '.':
+                    return None
+
+                for end in separators[k+2:]:
+                    if head[pos+1:end] in obj:
+                        return None
+
+                prefix = head[pos+1:] + '['
+                if any(key.startswith(prefix) for key in obj):
+                    return None
+
+                key = head[pos+1:separators[k+1]]
+                if key not in obj:
+                    return None
+
+                obj = obj[key]
+                k += 1
+
+            elif isinstance(obj, list):
+                close = head.find(']', pos)
+                if head[pos] != '[' or close == -1:
+                    return None
+
+                index = head[pos+1:close]
+                obj = typing.cast(list[typing.Any], obj)
+                if not index.isdigit() or str(int(index)) != index or int(index) >= len(obj):
+                    return None
+
+                k = bisect.bisect_left(separators, close + 1)
+                if separators[k] != close + 1:
+                    return None
+
+                crossed = crossed or depth > 0
+                obj = obj[int(index)]
+
+            else:
+                return None
+
+            depth += 1
+
+    def resolve_template(self, path: str, alt: 'Alternative', index: int) -> 'Resolved':
+        """
+        Same as resolve(path), `path` being `alt` with its "[]" expanded to
+        "[index]". The part before "[]" is walked once for every index, and
+        only the rest of the path is walked from the element.
+        """
+        if path in self._cache:
+            return self._cache[path]
+
+        parts = typing.cast(tuple[str, ...], alt.parts)
+        if len(parts) != 2 or parts[1][:1] not in ('', '.', '['):
+            return self.resolve(path)
+
+        head, tail = parts
+        if self._bases is None:
+            self._bases = {}
+
+        if head not in self._bases:
+            self._bases[head] = self._base(head)
+
+        # no base is either no result or an ambiguous one, resolve() knows
+        if (base := self._bases[head]) is None:
+            return self.resolve(path)
+
+        items, depth, crossed = base
+        crossed = crossed or depth > 0
+
+        if index >= len(items):
+            ret = None, (False, None)
+        elif tail[:1] == '.' \
+                and isinstance(item := items[index], dict) \
+                and (key := tail[1:]) in item \
+                and '.' not in key and '[' not in key \
+                and not isinstance(value := typing.cast(RawObject, item)[key], dict | list):
+            # a key of the element holding a scalar, by far the most common
+            ret = value, ((False, None) if crossed else (True, value))
         else:
-            ret[parent] = obj
+            ret = self._resolve_at(items[index], tail, depth + 1, crossed)
+
+        self._cache[path] = ret
+        return ret
+
+    def get(self, path: str) -> typing.Any:
+        return self.resolve(path)[0]
+
+    def get_preserved(self, path: str) -> tuple[bool, typing.Any]:
+        return self.resolve(path)[1]
+
+class DocumentIndex(PathResolver):
+    """
+    A record along with its memoized path lookups, to be passed to
+    translate() (or a compile_function() function) in place of the record
+    when translating it with several mappings. Each dotted, indexed or
+    expanded "[]" path is then resolved once for all of them. The record
+    must not be changed while the index is in use.
+    """
+
+    __slots__ = ()
+
+    @property
+    def record(self) -> typing.Any:
+        return self.target
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Alternative:
+    name: str
+    parts: tuple[str, ...] | None
+    is_path: bool
+    is_var: bool
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class CompiledNode:
+    name: str
+    alternatives: tuple[Alternative, ...]
+    modifiers: frozenset[Modifier]
+    enforce: bool
+    default_null: bool
+    normalize_unicode: bool
+    type: AcceptedType
+    expected: str | None
+    array: bool
+    has_default: bool
+    default: typing.Any
+    trim_start: int | None
+    trim_end: int | None
+    pick_until: str | None
+    enum: dict[str, str] | None
+    datetime_format: str | None
+    accepted: frozenset[str] | None
+    mapped: bool
+    mapping: 'CompiledMapping | None'
+    memo: 'ValueCache | None'
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class CompiledMapping:
+    array: bool
+    modifiers: tuple[Modifier, ...]
+    fields: tuple[CompiledNode, ...] | None
+
+    def apply(self, target: typing.Any, substitute: dict[str, typing.Any] = {}) -> typing.Any:
+        return translate(target, self, substitute=substitute)
+
+ValueCacheStats = typing.TypedDict('ValueCacheStats', {
+    'hits': int,
+    'misses': int,
+    'size': int,
+    'maxsize': int
+})
+
+# other types either compare equal across classes (-0.0 and 0.0) or could
+# be changed through a shared result
+_MEMO_TYPES = (str, int, bool, type(None))
+
+_MISSING = object()
+
+class ValueCache:
+    """
+    Least recently used results of a leaf field's modifiers, type check and
+    enum lookup, keyed on the value they were applied to.
+    """
+    __slots__ = ('maxsize', 'hits', 'misses', 'values')
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.values: dict[tuple[type, typing.Any], typing.Any] = {}
+
+    def __call__(self, node: 'CompiledNode', mapped_name: str, value: typing.Any) -> typing.Any:
+        if value.__class__ not in _MEMO_TYPES:
+            return _finish(node, _handle_modifiers(node, mapped_name, value))
+
+        values = self.values
+        key = (value.__class__, value)
+        if (ret := values.pop(key, _MISSING)) is not _MISSING:
+            self.hits += 1
+            values[key] = ret
+            return ret
+
+        # errors aren't cached, they raise again with the same message
+        ret = _finish(node, _handle_modifiers(node, mapped_name, value))
+        self.misses += 1
+
+        if len(values) >= self.maxsize:
+            values.pop(next(iter(values)), None)
+
+        values[key] = ret
+        return ret
+
+    def stats(self) -> ValueCacheStats:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.values),
+            'maxsize': self.maxsize
+        }
+
+    def clear(self):
+        self.hits = self.misses = 0
+        self.values.clear()
+
+_value_cache_size = 0
+
+def set_value_cache(maxsize: int):
+    """
+    Memoizes up to `maxsize` values per leaf field of mappings compiled
+    from now on, unless a node sets its own `cache` size. Disabled (0) by
+    default. Datetime fields cached this way keep the current date dateutil
+    filled into partial strings when they were first parsed.
+    """
+    global _value_cache_size
+    _value_cache_size = maxsize
+
+def value_cache_size() -> int:
+    return _value_cache_size
+
+# nodes share their modifier and accepted type sets, there are few distinct ones
+_frozensets: dict[frozenset[typing.Any], frozenset[typing.Any]] = {}
+
+def _shared(items: typing.Iterable[T]) -> frozenset[T]:
+    items = frozenset(items)
+    return _frozensets.setdefault(items, items)
+
+def compile_alternative(name: str):
+    return Alternative(
+        name=name,
+        parts=tuple(name.split('[]')) if '[]' in name else None,
+        is_path=name[:1] in ('.', '['),
+        is_var=name[:2] == '{{' and name[-2:] == '}}'
+    )
+
+def compile_node(original_name: str, node: Node, inherited_modifiers: list[Modifier]):
+    mapped_name = node.get('map', original_name)
+    modifiers = node.get('modifiers', inherited_modifiers)
+    if 'reverse' in modifiers:
+        mapped_name, original_name = original_name, typing.cast(str, mapped_name)
+
+    names = mapped_name if isinstance(mapped_name, list) else mapped_name.split('|')
+    node_type = node.get('type', 'string')
+    expected = TYPE_MAPPING.get(node_type)
+
+    # class names check_types() lets through for plain (non-array, non-enum) nodes
+    accepted: frozenset[str] | None = None
+    if not node.get('array') and not node.get('enum'):
+        accepted = _shared(
+            ([expected] if expected else [])
+            + (['int'] if expected in ['number', 'float'] else [])
+            + (['NoneType'] if 'default_null' in modifiers else [])
+        )
+
+    return CompiledNode(
+        name=original_name,
+        alternatives=tuple(compile_alternative(n.strip()) for n in names),
+        modifiers=_shared(modifiers),
+        enforce='enforce' in modifiers,
+        default_null='default_null' in modifiers,
+        normalize_unicode='normalize_unicode' in modifiers,
+        type=node_type,
+        expected=expected,
+        array=bool(node.get('array')),
+        has_default='default' in node,
+        default=node.get('default'),
+        trim_start=node.get('trim_start'),
+        trim_end=node.get('trim_end'),
+        pick_until=node.get('pick_until'),
+        enum=node.get('enum') or None,
+        datetime_format=node.get('datetime_format'),
+        accepted=accepted,
+        mapped=bool(node.get('map')),
+        mapping=compile_mapping(node, modifiers) if '__fields' in node else None,
+        memo=ValueCache(cache_size) \
+            if (cache_size := node.get('cache', _value_cache_size)) > 0 and not node.get('array') and '__fields' not in node \
+            else None
+    )
+
+def compile_mapping(mapping: Mapping | Node, inherited_modifiers: list[Modifier] | None = None) -> CompiledMapping:
+    modifiers = mapping.get('modifiers', inherited_modifiers or [])
+    fields = tuple(
+        compile_node(name, node, modifiers)
+        for name, node in mapping['__fields'].items()
+    ) if '__fields' in mapping else None
+
+    return CompiledMapping(
+        array=bool(mapping.get('array')),
+        modifiers=tuple(modifiers),
+        fields=fields
+    )
+
+def value_cache_stats(plan: CompiledMapping, prefix: str = '') -> dict[str, ValueCacheStats]:
+    """
+    Returns the hit and miss counts of every memoized field of `plan`, by
+    output field path.
+    """
+    ret: dict[str, ValueCacheStats] = {}
+    for node in plan.fields or ():
+        path = '%s.%s' % (prefix, node.name) if prefix else '%s' % (node.name,)
+        if node.memo is not None:
+            ret[path] = node.memo.stats()
+        if node.mapping is not None:
+            ret.update(value_cache_stats(node.mapping, path))
+
+    return ret
+
+class MappingError(ValueError):
+    """
+    Raised by validate_mapping() with every problem found in a mapping.
+    """
+
+    def __init__(self, errors: list[str]):
+        super().__init__(errors)
+        self.errors = errors
+
+    def __str__(self):
+        return '\n'.join(self.errors)
+
+_MODIFIERS = frozenset(typing.get_args(Modifier))
+_TYPES = frozenset(typing.get_args(AcceptedType))
+
+def _is_int(value: typing.Any):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _fields_errors(fields: typing.Any, path: str, modifiers: typing.Any, errors: list[str]):
+    if not isinstance(fields, dict):
+        errors.append('%s: __fields must be an object' % path)
+        return
+
+    for name, node in typing.cast(dict[typing.Any, typing.Any], fields).items():
+        _node_errors(node, '%s.%s' % (path, name) if path != 'mapping' else str(name), modifiers, errors)
+
+def _modifiers_errors(modifiers: typing.Any, path: str, errors: list[str]):
+    if not isinstance(modifiers, list):
+        errors.append('%s: modifiers must be a list' % path)
+        return
+
+    for modifier in typing.cast(list[typing.Any], modifiers):
+        if modifier not in _MODIFIERS:
+            errors.append('%s: unknown modifier %r' % (path, modifier))
+
+def _node_errors(node: typing.Any, path: str, inherited_modifiers: typing.Any, errors: list[str]):
+    if not isinstance(node, dict):
+        errors.append('%s: node must be an object' % path)
+        return
+
+    node = typing.cast(dict[str, typing.Any], node)
+    for key in sorted(node.keys() - Node.__optional_keys__):
+        errors.append('%s: unknown key %r' % (path, key))
+
+    modifiers = node.get('modifiers', inherited_modifiers)
+    if 'modifiers' in node:
+        _modifiers_errors(modifiers, path, errors)
+
+    if 'map' in node:
+        names: typing.Any = node['map']
+        if isinstance(names, str):
+            names = names.split('|')
+
+        if not isinstance(names, list) or not names \
+                or not all(isinstance(name, str) and name.strip() for name in typing.cast(list[typing.Any], names)):
+            errors.append('%s: map must be a non-empty name or list of names' % path)
+        elif isinstance(node['map'], list) and isinstance(modifiers, list) and 'reverse' in modifiers:
+            errors.append('%s: reverse needs a single name in map' % path)
+
+    if 'type' in node and node['type'] not in _TYPES:
+        errors.append('%s: unknown type %r' % (path, node['type']))
+
+    for key, valid, expected in [
+        ('array', isinstance(node.get('array'), bool), 'a boolean'),
+        ('trim_start', _is_int(node.get('trim_start')), 'an integer'),
+        ('trim_end', _is_int(node.get('trim_end')), 'an integer'),
+        ('cache', _is_int(node.get('cache')) and node['cache'] >= 0, 'a non-negative integer'),
+        ('pick_until', isinstance(node.get('pick_until'), str) and node['pick_until'] != '', 'a non-empty string'),
+        ('datetime_format', isinstance(node.get('datetime_format'), str), 'a string'),
+        ('enum', isinstance(node.get('enum'), dict), 'an object')
+    ]:
+        if key in node and not valid:
+            errors.append('%s: %s must be %s' % (path, key, expected))
+
+    if '__fields' in node:
+        _fields_errors(node['__fields'], path, modifiers, errors)
+
+def validate_mapping(mapping: typing.Any):
+    """
+    Checks a whole mapping tree at once: key names, types and modifiers
+    against the accepted values, and the shape of every attribute. Raises a
+    MappingError listing every problem, so mistakes surface when a mapping
+    is loaded instead of on the first record that reaches them. Whether
+    `array` matches the records can only be known translating them.
+    """
+    errors: list[str] = []
+    if not isinstance(mapping, dict):
+        raise MappingError(['mapping: must be an object'])
+
+    mapping = typing.cast(dict[str, typing.Any], mapping)
+    for key in sorted(mapping.keys() - Mapping.__optional_keys__):
+        errors.append('mapping: unknown key %r' % key)
+
+    if 'array' in mapping and not isinstance(mapping['array'], bool):
+        errors.append('mapping: array must be a boolean')
+
+    if 'modifiers' in mapping:
+        _modifiers_errors(mapping['modifiers'], 'mapping', errors)
+
+    if '__fields' not in mapping:
+        errors.append('mapping: __fields not present')
+    else:
+        _fields_errors(mapping['__fields'], 'mapping', mapping.get('modifiers', []), errors)
+
+    if errors:
+        raise MappingError(errors)
+
+ISO_DATETIME = re.compile(r'\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?)?')
+
+def parse_datetime(value: typing.Any, datetime_format: str | None = None) -> typing.Any:
+    """
+    Parses `value` with datetime.fromisoformat() when `datetime_format` is
+    'iso', with datetime.strptime() when it is a format string, and with
+    dateutil otherwise. Naive ISO-8601 strings skip dateutil, whose result
+    they would match anyway.
+    """
+    if isinstance(value, str):
+        if datetime_format == 'iso':
+            return datetime.fromisoformat(value)
+        if datetime_format:
+            return datetime.strptime(value, datetime_format)
+
+        if ISO_DATETIME.fullmatch(value):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+
+    return dateparser.parse(value)
+
+_parse_datetime_cached: typing.Callable[[typing.Any, str | None], typing.Any] = parse_datetime
+
+def set_datetime_cache(maxsize: int | None):
+    """
+    Caches up to `maxsize` parsed datetime strings (unbounded when None),
+    or disables the cache when 0. Disabled by default, since dateutil fills
+    missing fields of partial strings from the current date.
+    """
+    global _parse_datetime_cached
+    _parse_datetime_cached = functools.lru_cache(maxsize)(parse_datetime) \
+        if maxsize != 0 \
+        else parse_datetime
+
+FieldProfile = typing.TypedDict('FieldProfile', {
+    'calls': int,
+    'time_ns': int,
+    'hits': dict[int, int],
+    'casts': int
+})
+
+class Profiler:
+    """
+    Records per output field path how many times it was translated, the
+    cumulative (inclusive) time spent on it, which alternative position
+    provided its value (-1 when none did) and how many values were cast by
+    `enforce`. Only active inside a `with` block, and only in the context
+    it was entered in: translations outside of it, or on other threads
+    (atranslate() included), don't pay for the bookkeeping.
+    """
+    def __init__(self):
+        self.fields: dict[str, FieldProfile] = {}
+        self.current = ''
+        self._token: contextvars.Token[Profiler | None] | None = None
+
+    def __enter__(self):
+        self._token = _profiler.set(self)
+        return self
+
+    def __exit__(self, *_: typing.Any):
+        _profiler.reset(typing.cast(contextvars.Token[Profiler | None], self._token))
+        self._token = None
+
+    def field(self, path: str) -> FieldProfile:
+        if (stats := self.fields.get(path)) is None:
+            stats = self.fields[path] = { 'calls': 0, 'time_ns': 0, 'hits': {}, 'casts': 0 }
+        return stats
+
+    def cast(self):
+        self.field(self.current)['casts'] += 1
+
+    def to_dict(self):
+        return {
+            path: { **stats, 'hits': dict(sorted(stats['hits'].items())) }
+            for path, stats in sorted(self.fields.items())
+        }
+
+    def to_json(self, **kwargs: typing.Any):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_collapsed(self):
+        """
+        Folded stacks (`root;parent;field <self time in microseconds>`)
+        as consumed by flamegraph.pl, speedscope and inferno.
+        """
+        self_time = { path: stats['time_ns'] for path, stats in self.fields.items() }
+        for path, stats in self.fields.items():
+            parent, _, _ = path.rpartition('.')
+            if parent and parent in self_time:
+                self_time[parent] -= stats['time_ns']
+
+        return ''.join(
+            '%s %d\n' % (';'.join(['root', *filter(None, path.split('.'))]), max(time_ns // 1000, 0))
+            for path, time_ns in sorted(self_time.items())
+        )
+
+_profiler: contextvars.ContextVar[Profiler | None] = contextvars.ContextVar('normalize_json_profiler', default=None)
+
+def _check_types(node: CompiledNode, value: typing.Any):
+    if node.accepted is not None:
+        actual = value.__class__.__name__
+        return None if actual in node.accepted else (actual, node.type)
+
+    if node.array and value == []:
+        return None
+
+    actual = value[0].__class__.__name__ \
+        if node.array \
+        else value.__class__.__name__
+
+    if node_enum := node.enum:
+        if actual == 'NoneType' and node.default_null:
+            return None
+
+        if node.array:
+            for v in value:
+                if v not in node_enum:
+                    break
+            else:
+                return None
+        elif value in node_enum:
+            return None
+
+        return value, list(node_enum.keys())
+
+    vexpected = node.expected
+    if actual == vexpected \
+            or (actual == 'int' and vexpected in ['number', 'float']) \
+            or (actual == 'NoneType' and node.default_null):
+        return None
+
+    return actual, node.type
+
+_NOT_NUMBER = re.compile(r'[^0-9\.]')
+_NOT_INTEGER = re.compile(r'[^0-9]')
+
+# every UTF-8 byte but the digits (and "."), with the "\n" columns are
+# joined with kept: non-ASCII characters are all bytes above 0x7f
+_NOT_NUMBER_BYTES = bytes(c for c in range(256) if c not in b'0123456789.\n')
+_NOT_INTEGER_BYTES = bytes(c for c in range(256) if c not in b'0123456789\n')
+
+def _enforce(node: CompiledNode, value: typing.Any) -> typing.Any:
+    if (profiler := _profiler.get()) is not None:
+        profiler.cast()
+
+    match node.type:
+        case 'number':
+            value = _NOT_NUMBER.sub('', value) or 0
+            return float(value)
+        case 'integer':
+            value = _NOT_INTEGER.sub('', value) or 0
+            return int(value)
+        case 'string': return str(value)
+        case 'datetime':
+            return _parse_datetime_cached(value, node.datetime_format) \
+                if isinstance(value, str) \
+                else parse_datetime(value, node.datetime_format)
+        case _: return value
+
+def _cast_number(value: typing.Any, integer: bool) -> typing.Any:
+    return int(_NOT_INTEGER.sub('', value) or 0) \
+        if integer \
+        else float(_NOT_NUMBER.sub('', value) or 0)
+
+def _cast_numbers(values: list[typing.Any], integer: bool) -> list[typing.Any]:
+    # the exception a value raises takes its place
+    if (profiler := _profiler.get()) is not None:
+        for _ in values:
+            profiler.cast()
+
+    cast = int if integer else float
+    try:
+        joined = '\n'.join(values)
+    except TypeError:
+        joined = None
+
+    if joined is not None and joined.count('\n') == len(values) - 1:
+        digits = joined \
+            .encode('utf-8', 'surrogatepass') \
+            .translate(None, _NOT_INTEGER_BYTES if integer else _NOT_NUMBER_BYTES) \
+            .split(b'\n')
+
+        try:
+            return [cast(d or 0) for d in digits]
+        except ValueError:
+            pass
+
+    ret: list[typing.Any] = []
+    for value in values:
+        try:
+            ret.append(_cast_number(value, integer))
+        except Exception as e:
+            ret.append(e)
 
-    internal_flatten(target)
     return ret
 
+def cast_numbers(values: list[typing.Any], type: typing.Literal['number', 'integer']) -> list[typing.Any]:
+    """
+    Casts a column of strings the way the `enforce` modifier casts each
+    one, stripping everything but the digits (and "." for numbers) in a
+    single pass. Raises the first error casting them one by one would.
+    """
+    ret = _cast_numbers(values, type == 'integer')
+    for value in ret:
+        if isinstance(value, Exception):
+            raise value
+
+    return ret
+
+def _handle_modifiers(node: CompiledNode, mapped_name: str, old_value: typing.Any):
+    value = old_value
+
+    if value == None:
+        if node.has_default:
+            value = node.default
+        elif node.default_null:
+            return None
+        else:
+            raise ValueError('value for %s wasnt provided' % mapped_name)
+
+    if node.normalize_unicode and isinstance(value, str):
+        value = unicodedata.normalize('NFKD', value)
+
+    if trim := node.trim_start:
+        value = value[trim*-1:]
+
+    if trim := node.trim_end:
+        value = value[:trim]
+
+    if pick := node.pick_until:
+        value = value.split(pick)[0]
+
+    if node.enforce and _check_types(node, value):
+        value = _enforce(node, value)
+
+    return value
+
+# check_types() and handle_modifiers() work on raw nodes the same way
+# _check_types() and _handle_modifiers() do on compiled ones, compiling a
+# node for a single value would cost more than the call itself
 
 def check_types(node: Node, value: typing.Any, modifiers: list[Modifier]):
     if node.get('array') and value == []:
@@ -158,15 +1180,18 @@ def handle_modifiers(node: Node, mapped_name: str, modifiers: list[Modifier], ol
         value = value.split(pick)[0]
 
     if 'enforce' in modifiers and check_types(node, value, modifiers):
+        if (profiler := _profiler.get()) is not None:
+            profiler.cast()
+
         match node.get('type', 'string'):
-            case 'number':
-                value = re.sub(r'[^0-9\.]', '', value) or 0
-                value = float(value)
-            case 'integer':
-                value = re.sub(r'[^0-9]', '', value) or 0
-                value = int(value)
+            case 'number': value = float(_NOT_NUMBER.sub('', value) or 0)
+            case 'integer': value = int(_NOT_INTEGER.sub('', value) or 0)
             case 'string': value = str(value)
-            case 'datetime': value = dateparser.parse(value)
+            case 'datetime':
+                datetime_format = node.get('datetime_format')
+                value = _parse_datetime_cached(value, datetime_format) \
+                    if isinstance(value, str) \
+                    else parse_datetime(value, datetime_format)
             case _: ...
 
     return value
@@ -178,122 +1203,305 @@ def get_initial_value(target: typing.Any, mapped_name: str, flat_obj: RawObject)
 
     return initial_value
 
+def _lookup(node: CompiledNode, target: RawObject, target_index: int, resolver: PathResolver):
+    mapped_name = ''
+    for alt in node.alternatives:
+        mapped_name = alt.name \
+            if alt.parts is None \
+            else ('[%d]' % target_index).join(alt.parts)
+
+        if target.get(mapped_name):
+            return target[mapped_name], mapped_name, None
+        elif alt.is_path:
+            value, (found, preserved) = resolver.resolve(mapped_name) \
+                if alt.parts is None \
+                else resolver.resolve_template(mapped_name, alt, target_index)
+
+            if value:
+                return value, mapped_name, None
+            if found and preserved != None:
+                return preserved, mapped_name, None
+        elif alt.is_var:
+            return None, mapped_name, mapped_name[2:].replace(' ', '')[:-2]
+
+    return None, mapped_name, None
+
+def _translate_child(
+    node: CompiledNode,
+    target: RawObject,
+    initial_value: typing.Any,
+    resolver: PathResolver,
+    substitute: dict[str, typing.Any]
+) -> typing.Any:
+    mapping = typing.cast(CompiledMapping, node.mapping)
+    if not node.mapped:
+        value = _translate(target, mapping, 0, resolver.scope(target), substitute)
+    else:
+        child: typing.Any = typing.cast(typing.Any, initial_value) \
+                if initial_value or isinstance(initial_value, list) \
+                else target[node.name]
+        value = _translate(child, mapping, 0, resolver, substitute)
+
+    if node.array and not isinstance(value, list):
+        value = [value]
+
+    return typing.cast(typing.Any, value)
+
+def _finish(node: CompiledNode, value: typing.Any) -> typing.Any:
+    if node.array and not isinstance(value, list):
+        value = [value]
+
+    default = node.default
+    if err := _check_types(node, value):
+        if not default:
+            raise ValueError('check_types @ %s (got "%s", expected "%s")' % (node.name, *err))
+
+    if (node_enum := node.enum) and value != None:
+        if node.array:
+            if not isinstance(value, list):
+                raise TypeError()
+            value = [
+                node_enum.get(v, default)
+                for v in typing.cast(list[str], value)
+            ]
+        else:
+            value = node_enum.get(typing.cast(typing.Any, value), default)
+
+    return typing.cast(typing.Any, value)
+
+def _translate_fields(
+    target: RawObject,
+    plan: CompiledMapping,
+    target_index: int,
+    resolver: PathResolver,
+    substitute: dict[str, typing.Any]
+):
+    if plan.fields is None:
+        raise TypeError('__fields not present')
 
-def translate(
-    target: T | tuple[T, int],
-    mapping: Mapping, acc: RawObject = {},
-    inherited_modifiers: list[Modifier] | None = None,
-    inherited_flat_obj: tuple[RawObject, RawObject] | None = None,
-    substitute: dict[str, typing.Any] = {}
-) -> T:
     ret: RawObject = {}
-    flat_obj, flat_obj_arr = inherited_flat_obj or (
-        flatten(typing.cast(RawObject, target)),
-        flatten(typing.cast(RawObject, target), preserve_arrays=True)
-    )
 
-    target_index: int = 0
+    for node in plan.fields:
+        initial_value, mapped_name, var_name = _lookup(node, target, target_index, resolver)
 
-    if isinstance(target, tuple):
-        target, target_index = typing.cast(tuple[T, int], target)
+        if var_name:
+            ret[node.name] = substitute.get(var_name)
+            continue
 
-    if isinstance(target, dict):
-        if '__fields' not in mapping:
-            raise TypeError('__fields not present')
+        if node.mapping is not None:
+            ret[node.name] = _translate_child(node, target, initial_value, resolver, substitute)
+            continue
 
-        root_modifiers = mapping.get('modifiers', inherited_modifiers or [])
+        if initial_value == None:
+            initial_value = resolver.get(mapped_name) \
+                if mapped_name[0] == '.' \
+                else target.get(mapped_name)
 
-        for original_name, node in mapping['__fields'].items():
-            mapped_name = node.get('map', original_name)
-            initial_value: typing.Any = None
+        if (memo := node.memo) is not None:
+            ret[node.name] = memo(node, mapped_name, initial_value)
+            continue
 
-            var_name: str|None = None
+        ret[node.name] = _finish(node, _handle_modifiers(node, mapped_name, initial_value))
 
-            modifiers = node.get('modifiers', root_modifiers)
-            if 'reverse' in modifiers:
-                mapped_name, original_name = original_name, mapped_name
+    return ret
 
-            for n in mapped_name if isinstance(mapped_name, list) else mapped_name.split('|'):
-                mapped_name = n.strip()
+def _translate_fields_profiled(
+    target: RawObject,
+    plan: CompiledMapping,
+    target_index: int,
+    resolver: PathResolver,
+    substitute: dict[str, typing.Any],
+    profiler: Profiler
+):
+    if plan.fields is None:
+        raise TypeError('__fields not present')
 
-                if '[]' in mapped_name:
-                    mapped_name = mapped_name.replace('[]', '[%d]' % target_index)
+    ret: RawObject = {}
+    parent = profiler.current
 
-                if typing.cast(typing.Any, target).get(mapped_name):
-                    initial_value = target[mapped_name]
-                    break
-                elif flat_obj.get(mapped_name):
-                    mapped_name = mapped_name
-                    initial_value = flat_obj[mapped_name]
-                    break
-                elif mapped_name in flat_obj_arr and flat_obj_arr[mapped_name] != None:
-                    initial_value = flat_obj_arr.get(mapped_name)
-                    break
-                elif mapped_name[:2] == "{{" and mapped_name[-2:] == "}}":
-                    var_name = mapped_name[2:].replace(' ', '')[:-2]
-                    break
+    for node in plan.fields:
+        path = profiler.current = '%s.%s' % (parent, node.name) if parent else node.name
+        stats = profiler.field(path)
+        start = time.perf_counter_ns()
 
-            mapped_name = typing.cast(str, mapped_name)
-            original_name = typing.cast(str, original_name)
+        try:
+            initial_value, mapped_name, var_name = _lookup(node, target, target_index, resolver)
+
+            hit = -1
+            if var_name or initial_value != None:
+                hit = next((
+                    i for i, alt in enumerate(node.alternatives)
+                    if mapped_name == (alt.name if alt.parts is None else ('[%d]' % target_index).join(alt.parts))
+                ), -1)
+            stats['hits'][hit] = stats['hits'].get(hit, 0) + 1
 
             if var_name:
-                ret[original_name] = substitute.get(var_name)
+                ret[node.name] = substitute.get(var_name)
                 continue
 
-            if '__fields' in node:
-                if not node.get('map'):
-                    value = translate(typing.cast(typing.Any, target), node, acc, modifiers, substitute=substitute)
-                else:
-                    child: typing.Any = initial_value \
-                            if initial_value or isinstance(initial_value, list) \
-                            else target[original_name]
-                    value = translate(child, node, acc, modifiers, (flat_obj, flat_obj_arr), substitute=substitute)
-                if node.get('array') and not isinstance(value, list):
-                    value = [value]
-
-                ret[original_name] = value
+            if node.mapping is not None:
+                ret[node.name] = _translate_child(node, target, initial_value, resolver, substitute)
                 continue
 
             if initial_value == None:
-                initial_value = get_initial_value(target, mapped_name, flat_obj)
-
-            value = handle_modifiers(node, mapped_name, modifiers, initial_value)
-            if node.get('array') and not isinstance(value, list):
-                value = [value]
-
-            default = node.get('default')
-            if err := check_types(node, value, modifiers):
-                if not default:
-                    raise ValueError('check_types @ %s (got "%s", expected "%s")' % (original_name, *err))
-
-            if (node_enum := node.get('enum')) and value != None:
-                if node.get('array'):
-                    if not isinstance(value, list):
-                        raise TypeError()
-                    value = [
-                        node.get('enum', {}).get(v, default)
-                        for v in typing.cast(list[str], value)
-                    ]
-                else:
-                    value = node_enum.get(typing.cast(typing.Any, value), default)
-
-            ret[original_name] = value
+                initial_value = resolver.get(mapped_name) \
+                    if mapped_name[0] == '.' \
+                    else target.get(mapped_name)
+
+            if (memo := node.memo) is not None:
+                ret[node.name] = memo(node, mapped_name, initial_value)
+                continue
+
+            ret[node.name] = _finish(node, _handle_modifiers(node, mapped_name, initial_value))
+        finally:
+            stats['calls'] += 1
+            stats['time_ns'] += time.perf_counter_ns() - start
+            profiler.current = parent
+
+    return ret
+
+def _translate(
+    target: typing.Any,
+    plan: CompiledMapping,
+    target_index: int,
+    resolver: PathResolver,
+    substitute: dict[str, typing.Any]
+) -> typing.Any:
+    if isinstance(target, dict):
+        if (profiler := _profiler.get()) is not None:
+            return _translate_fields_profiled(
+                typing.cast(RawObject, target),
+                plan,
+                target_index,
+                resolver,
+                substitute,
+                profiler
+            )
+
+        return _translate_fields(
+            typing.cast(RawObject, target),
+            plan,
+            target_index,
+            resolver,
+            substitute
+        )
 
     if isinstance(target, list):
-        if not mapping.get('array'):
+        if not plan.array:
             raise ValueError('illegal array')
 
-        result = [
-            translate((e, idx), mapping, acc, inherited_modifiers, (flat_obj, flat_obj_arr), substitute=substitute)
+        return [
+            _translate(e, plan, idx, resolver, substitute)
             for idx, e in enumerate(typing.cast(list[typing.Any], target))
         ]
 
-        return typing.cast(T, result)
+    return {}
+
+PLAN_CACHE_SIZE = 256
+
+_plans: dict[tuple[int, tuple[Modifier, ...] | None, int], tuple[Mapping, CompiledMapping]] = {}
 
-    return typing.cast(T, ret)
+def _cached_plan(mapping: Mapping, inherited_modifiers: list[Modifier] | None) -> CompiledMapping:
+    # plans are reused by the mapping's identity, checking it for changes
+    # made in place would cost as much as a translation. The mapping is
+    # kept in the entry so its id isn't reused while it's there
+    key = (id(mapping), tuple(inherited_modifiers) if inherited_modifiers is not None else None, _value_cache_size)
+    if (entry := _plans.get(key)) is not None and entry[0] is mapping:
+        return entry[1]
 
+    plan = compile_mapping(mapping, inherited_modifiers)
+    if len(_plans) >= PLAN_CACHE_SIZE and key not in _plans:
+        del _plans[next(iter(_plans))]
+
+    _plans[key] = (mapping, plan)
+    return plan
+
+def translate(
+    target: T | tuple[T, int],
+    mapping: Mapping | CompiledMapping,
+    acc: RawObject = {},
+    inherited_modifiers: list[Modifier] | None = None,
+    resolver: PathResolver | None = None,
+    substitute: dict[str, typing.Any] = {}
+) -> T:
+    plan = mapping \
+        if isinstance(mapping, CompiledMapping) \
+        else _cached_plan(mapping, inherited_modifiers)
+
+    target_index: int = 0
+
+    if isinstance(target, tuple):
+        target, target_index = typing.cast(tuple[T, int], target)
+
+    if isinstance(target, DocumentIndex):
+        resolver = resolver or target
+        target = typing.cast(T, target.target)
+
+    return typing.cast(T, _translate(
+        target,
+        plan,
+        target_index,
+        resolver or PathResolver(target),
+        substitute
+    ))
+
+class CompiledStringMapping(typing.NamedTuple):
+    synonyms: dict[str, str]
+    casefold: bool
+    normalize: typing.Literal['NFC', 'NFD', 'NFKC', 'NFKD'] | None
+
+    def key(self, value: str):
+        if self.normalize:
+            value = unicodedata.normalize(self.normalize, value)
+        if self.casefold:
+            value = value.casefold()
+        return value
+
+    def translate(self, target: str):
+        return self.synonyms.get(self.key(target) if self.casefold or self.normalize else target)
+
+    def translate_strings(self, values: typing.Iterable[str]) -> list[str | None]:
+        if not self.casefold and not self.normalize:
+            return list(map(self.synonyms.get, values))
+
+        seen: dict[str, str | None] = {}
+        ret: list[str | None] = []
+        for value in values:
+            if value not in seen:
+                seen[value] = self.synonyms.get(self.key(value))
+            ret.append(seen[value])
+
+        return ret
+
+def compile_string_mapping(
+    mapping: StringMapping,
+    casefold: bool = False,
+    normalize: typing.Literal['NFC', 'NFD', 'NFKC', 'NFKD'] | None = None,
+    strict: bool = True
+):
+    """
+    Builds a synonym -> key index for translate_string(). A synonym listed
+    under two keys raises ValueError, unless `strict` is False, in which
+    case the first key wins as it does in translate_string().
+    """
+    compiled = CompiledStringMapping(synonyms={}, casefold=casefold, normalize=normalize)
+
+    for k, v in mapping['__fields'].items():
+        for synonym in [v] if isinstance(v, str) else v:
+            synonym = compiled.key(synonym)
+            if (current := compiled.synonyms.get(synonym, k)) != k:
+                if strict:
+                    raise ValueError('"%s" is mapped to both %s and %s' % (synonym, current, k))
+                continue
+
+            compiled.synonyms[synonym] = current
+
+    return compiled
+
+def translate_string(target: str, mapping: StringMapping | CompiledStringMapping):
+    if isinstance(mapping, CompiledStringMapping):
+        return mapping.translate(target)
 
-def translate_string(target: str, mapping: StringMapping):
     for k, v in mapping['__fields'].items():
         if isinstance(v, str):
             if v == target:
@@ -302,3 +1510,8 @@ def translate_string(target: str, mapping: StringMapping):
             if target in v:
                 return k
 
+def translate_strings(values: typing.Iterable[str], mapping: StringMapping | CompiledStringMapping):
+    if not isinstance(mapping, CompiledStringMapping):
+        mapping = compile_string_mapping(mapping, strict=False)
+
+    return mapping.translate_strings(values)
@@ -0,0 +1,81 @@
+import typing
+import itertools
+import collections
+import concurrent.futures
+from .normalize import Mapping, CompiledMapping, compile_mapping, translate
+
+class RecordError(typing.NamedTuple):
+    record_index: int
+    error: str
+
+_worker_mapping: CompiledMapping | None = None
+_worker_substitute: dict[str, typing.Any] = {}
+
+def _init_worker(mapping: CompiledMapping, substitute: dict[str, typing.Any]):
+    global _worker_mapping, _worker_substitute
+    _worker_mapping = mapping
+    _worker_substitute = substitute
+
+def translate_chunk(
+    start: int,
+    records: list[typing.Any],
+    mapping: CompiledMapping | None = None,
+    substitute: dict[str, typing.Any] | None = None
+):
+    mapping = mapping or typing.cast(CompiledMapping, _worker_mapping)
+    substitute = _worker_substitute if substitute is None else substitute
+
+    ret: list[typing.Any] = []
+    for index, record in enumerate(records, start):
+        try:
+            ret.append(translate(record, mapping, substitute=substitute))
+        except Exception as e:
+            ret.append(RecordError(index, '%s: %s' % (e.__class__.__name__, e)))
+
+    return ret
+
+def _chunked(records: typing.Iterable[typing.Any], chunk_size: int):
+    it = iter(records)
+    start = 0
+    while chunk := list(itertools.islice(it, chunk_size)):
+        yield start, chunk
+        start += len(chunk)
+
+def translate_many(
+    records: typing.Iterable[typing.Any],
+    mapping: Mapping | CompiledMapping,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    substitute: dict[str, typing.Any] = {}
+) -> typing.Iterator[typing.Any]:
+    """
+    Translates `records` in input order, across `workers` processes when
+    greater than one. Records that fail to translate yield a RecordError
+    with their index instead of aborting the batch.
+    """
+    compiled = mapping \
+        if isinstance(mapping, CompiledMapping) \
+        else compile_mapping(mapping)
+
+    if workers <= 1:
+        for start, chunk in _chunked(records, chunk_size):
+            yield from translate_chunk(start, chunk, compiled, substitute)
+        return
+
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(compiled, substitute)
+    )
+
+    pending: collections.deque[concurrent.futures.Future[list[typing.Any]]] = collections.deque()
+    try:
+        for start, chunk in _chunked(records, chunk_size):
+            pending.append(executor.submit(translate_chunk, start, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -0,0 +1,240 @@
+import typing
+import json
+import re
+from .normalize import Buffer, Mapping, CompiledMapping, CompiledNode, compile_mapping
+
+MAX_CONTEXTS = 64
+
+def _node_paths(
+    node: CompiledNode,
+    targets: list[str],
+    resolvers: list[str],
+    paths: set[str]
+):
+    contexts: list[str] = []
+
+    for alt in node.alternatives:
+        # _lookup() tries every name as a same-level key before anything else
+        contexts += ['%s.%s' % (target, alt.name) for target in targets]
+        if alt.is_path:
+            contexts += [resolver + alt.name for resolver in resolvers]
+
+    if node.mapping is not None and node.mapped:
+        contexts += ['%s.%s' % (target, node.name) for target in targets]
+
+    paths.update(contexts)
+
+    if node.mapping is None:
+        return
+
+    if node.mapped:
+        children = list(dict.fromkeys(
+            contexts + ['%s[]' % context for context in contexts]
+                if node.mapping.array
+                else contexts
+        ))
+
+        # whatever is under the children's targets is kept whole already, so
+        # past this many only the paths read through the resolver matter
+        _mapping_paths(node.mapping, children if len(children) <= MAX_CONTEXTS else [], resolvers, paths)
+    else:
+        _mapping_paths(node.mapping, targets, targets, paths)
+
+def _mapping_paths(plan: CompiledMapping, targets: list[str], resolvers: list[str], paths: set[str]):
+    for node in plan.fields or ():
+        _node_paths(node, targets, resolvers, paths)
+
+def source_paths(mapping: Mapping | CompiledMapping) -> set[str]:
+    """
+    Returns the flatten()-style paths (".a.b", ".items[].sku") a mapping
+    can read from a record, "[]" standing for any index. A path covers the
+    whole value under it. Names are also read as same-level keys, so a path
+    ".a.b" mapped at the top level yields "..a.b" (the key ".a.b") too.
+    """
+    plan = mapping \
+        if isinstance(mapping, CompiledMapping) \
+        else compile_mapping(mapping)
+
+    paths: set[str] = set()
+    _mapping_paths(plan, ['', '[]'] if plan.array else [''], [''], paths)
+    return paths
+
+SKIP_DEPTH = 16
+
+# a document without any '\\"' in it can't have a quote inside a string, so
+# its strings are skipped with a much faster single character class
+_STRINGS = r'"[^"\\]*+(?:\\.[^"\\]*+)*+"', r'"[^"]*+"'
+
+def _container_pattern(string: str, depth: int) -> str:
+    # each level is matched whole by the regex engine, possessive
+    # quantifiers keep it from backtracking into strings
+    inner = r'(?:[^"\[\]{}]++|%s)*+' % string
+    for _ in range(depth):
+        inner = r'(?:[^"\[\]{}]++|%s|[\[{]%s[\]}])*+' % (string, inner)
+    return r'[\[{]%s[\]}]' % inner
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING = tuple(re.compile(string, re.DOTALL) for string in _STRINGS)
+_CONTAINER = tuple(re.compile(_container_pattern(string, SKIP_DEPTH - 1), re.DOTALL) for string in _STRINGS)
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_SCALAR = re.compile(r'[^,\]}\s]*')
+_INDEX = re.compile(r'\[(\d+)\]')
+
+_decoder = json.JSONDecoder()
+
+Paths = frozenset[str]
+
+def _skip(text: str, pos: int, fast: bool) -> int:
+    match text[pos]:
+        case '"':
+            if (string := _STRING[fast].match(text, pos)) is None:
+                raise ValueError('unterminated string at %d' % pos)
+            return string.end()
+        case '{' | '[':
+            if container := _CONTAINER[fast].match(text, pos):
+                return container.end()
+
+            # nested deeper than SKIP_DEPTH
+            depth = 0
+            while (found := _STRUCTURAL.search(text, pos)) is not None:
+                char = found.group()
+                if char == '"':
+                    pos = _skip(text, found.start(), fast)
+                    continue
+
+                depth += 1 if char in '[{' else -1
+                pos = found.end()
+                if depth == 0:
+                    return pos
+
+            raise ValueError('unterminated value')
+        case _:
+            return _SCALAR.match(text, pos).end() # type: ignore
+
+def _key_matches(segment: str, key: str):
+    if '[]' not in segment:
+        return segment == key
+    return re.fullmatch(re.escape(segment).replace(r'\[\]', r'\[\d+\]'), key) is not None
+
+class _Projector:
+    def __init__(self, text: str):
+        self.text = text
+        # the single character search is much faster, and usually enough
+        self.fast = '\\' not in text or '\\"' not in text
+        self.keys: dict[tuple[Paths, str], Paths] = {}
+
+    def ws(self, pos: int) -> int:
+        return _WHITESPACE.match(self.text, pos).end() # type: ignore
+
+    def key(self, paths: Paths, key: str) -> Paths:
+        if (ret := self.keys.get((paths, key))) is not None:
+            return ret
+
+        rests: set[str] = set()
+        for path in paths:
+            if path[:1] != '.':
+                continue
+
+            # dotted keys make every separator a possible end of the key
+            for end in range(1, len(path) + 1):
+                if (end == len(path) or path[end] in '.[') and _key_matches(path[1:end], key):
+                    rests.add(path[end:])
+
+        ret = self.keys[(paths, key)] = frozenset(rests)
+        return ret
+
+    @staticmethod
+    def index(paths: Paths) -> tuple[Paths, dict[int, Paths]]:
+        every: set[str] = set()
+        indexes: dict[int, set[str]] = {}
+
+        for path in paths:
+            if path.startswith('[]'):
+                every.add(path[2:])
+            elif index := _INDEX.match(path):
+                indexes.setdefault(int(index.group(1)), set()).add(path[index.end():])
+
+        return frozenset(every), { i: frozenset(rests) for i, rests in indexes.items() }
+
+    def parse(self, pos: int, paths: Paths) -> tuple[typing.Any, int]:
+        text = self.text
+        if '' in paths:
+            return _decoder.raw_decode(text, pos)
+
+        match text[pos]:
+            case '{':
+                obj: dict[str, typing.Any] = {}
+                pos = self.ws(pos + 1)
+                if text[pos] == '}':
+                    return obj, pos + 1
+
+                while True:
+                    key, pos = _decoder.raw_decode(text, pos)
+                    if not isinstance(key, str):
+                        raise ValueError('expected a key at %d' % pos)
+
+                    pos = self.ws(pos)
+                    if text[pos] != ':':
+                        raise ValueError('expected ":" at %d' % pos)
+
+                    pos = self.ws(pos + 1)
+                    if rests := self.key(paths, key):
+                        obj[key], pos = self.parse(pos, rests)
+                    else:
+                        pos = _skip(text, pos, self.fast)
+
+                    pos = self.ws(pos)
+                    match text[pos]:
+                        case ',': pos = self.ws(pos + 1)
+                        case '}': return obj, pos + 1
+                        case _: raise ValueError('expected "," or "}" at %d' % pos)
+
+            case '[':
+                arr: list[typing.Any] = []
+                every, indexes = self.index(paths)
+                pos = self.ws(pos + 1)
+                if text[pos] == ']':
+                    return arr, pos + 1
+
+                # array mappings translate nested arrays element-wise too
+                nested = frozenset(path for path in paths if path.startswith('[]'))
+
+                while True:
+                    rests = every | indexes[len(arr)] if len(arr) in indexes else every
+                    if text[pos] == '[':
+                        rests |= nested
+                    if rests:
+                        value, pos = self.parse(pos, rests)
+                        arr.append(value)
+                    else:
+                        # keeps the positions of the elements that are read
+                        pos = _skip(text, pos, self.fast)
+                        arr.append(None)
+
+                    pos = self.ws(pos)
+                    match text[pos]:
+                        case ',': pos = self.ws(pos + 1)
+                        case ']': return arr, pos + 1
+                        case _: raise ValueError('expected "," or "]" at %d' % pos)
+
+            case _:
+                return _decoder.raw_decode(text, pos)
+
+def parse_projected(raw: Buffer, paths: typing.Iterable[str]) -> typing.Any:
+    """
+    Parses a JSON document building only the values `paths` (as returned
+    by source_paths()) can reach. Other object members are skipped over in
+    the text without being decoded or validated, and array elements no
+    path reads become None so indexes are kept. Translating the result
+    with the mapping the paths came from gives the same output as
+    translating the full document.
+    """
+    # decoded straight from the buffer, without a bytes copy of an mmap first
+    text = raw if isinstance(raw, str) else str(raw, 'utf-8')
+    projector = _Projector(text)
+
+    value, end = projector.parse(projector.ws(0), frozenset(paths))
+    if projector.ws(end) != len(text):
+        raise ValueError('extra data at %d' % end)
+
+    return value
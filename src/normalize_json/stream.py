@@ -0,0 +1,103 @@
+import typing
+import json
+from .normalize import unserialize
+
+InputFormat = typing.Literal[
+    'json',
+    'ndjson',
+    'array'
+]
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+
+_LITERALS = ('true', 'false', 'null', 'NaN', 'Infinity', '-Infinity')
+_NUMBER_CHARS = '0123456789.eE+-'
+
+def _truncated(buf: str, error: json.JSONDecodeError) -> bool:
+    # whether reading more could complete the value, as opposed to a syntax
+    # error that no amount of input would fix
+    tail = buf[error.pos:].rstrip()
+    return not tail \
+        or error.msg.startswith('Unterminated string') \
+        or (error.msg.startswith('Invalid \\uXXXX') and len(tail) <= 5) \
+        or (not tail.strip(_NUMBER_CHARS) and buf[error.pos - 1] in _NUMBER_CHARS) \
+        or any(literal.startswith(tail) for literal in _LITERALS)
+
+def iter_ndjson(fh: typing.IO[str]) -> typing.Iterator[typing.Any]:
+    # parsed with the same backend as an NDJSON file or buffer
+    for line in fh:
+        if line.strip():
+            yield unserialize(line)
+
+def iter_json_array(fh: typing.IO[str], chunk_size: int = CHUNK_SIZE) -> typing.Iterator[typing.Any]:
+    buf = ''
+    pos = 0
+    eof = False
+    state: typing.Literal['start', 'first', 'value', 'separator'] = 'start'
+
+    while True:
+        while pos < len(buf) and buf[pos] in ' \t\r\n':
+            pos += 1
+
+        if pos == len(buf):
+            if eof:
+                raise ValueError('unexpected end of JSON array')
+
+            buf, pos = fh.read(chunk_size), 0
+            eof = not buf
+            continue
+
+        match state, buf[pos]:
+            case 'start', '[':
+                state = 'first'
+                pos += 1
+                continue
+            case 'start', _:
+                raise ValueError('expected a top-level JSON array')
+            case ('first' | 'separator'), ']':
+                return
+            case 'separator', ',':
+                state = 'value'
+                pos += 1
+                continue
+            case 'separator', _:
+                raise ValueError('expected "," or "]" in JSON array')
+            case _: ...
+
+        try:
+            value, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            if not _truncated(buf, e):
+                raise ValueError('invalid JSON array element: %s' % e.msg)
+            value, end = None, -1
+
+        # a number is only complete once a delimiter follows it, otherwise
+        # "1.5e3" split across two chunks could be read as 1.5
+        incomplete = end == -1 or (not eof and (
+            end == len(buf)
+            or (isinstance(value, int | float) and buf[end] not in ' \t\r\n,]')
+        ))
+
+        if incomplete:
+            if eof:
+                raise ValueError('invalid JSON array element')
+
+            chunk = fh.read(max(chunk_size, len(buf) - pos))
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+
+        yield value
+        state = 'separator'
+        pos = end
+
+def iter_records(fh: typing.IO[str], input_format: InputFormat = 'json') -> typing.Iterator[typing.Any]:
+    match input_format:
+        case 'json':
+            yield unserialize(fh.read())
+        case 'ndjson':
+            yield from iter_ndjson(fh)
+        case 'array':
+            yield from iter_json_array(fh)
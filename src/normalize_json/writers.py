@@ -0,0 +1,219 @@
+import typing
+import abc
+import io
+import csv
+import json
+import importlib
+from .normalize import JsonBackend, Mapping, CompiledMapping, flatten
+from .parallel import RecordError, translate_many
+
+OutputFormat = typing.Literal[
+    'ndjson',
+    'array',
+    'csv'
+]
+
+BUFFER_SIZE = 1 << 16
+
+Encoder = typing.Callable[[typing.Any], bytes]
+
+def _stdlib_dumps(obj: typing.Any) -> bytes:
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+def json_encoder(backend: JsonBackend = 'json') -> Encoder:
+    """
+    Returns a function encoding one value to compact JSON bytes. orjson
+    and msgspec are faster, but write non-ASCII characters as UTF-8
+    instead of escaping them, and they encode datetimes.
+    """
+    match backend:
+        case 'orjson': return importlib.import_module('orjson').dumps
+        case 'msgspec': return importlib.import_module('msgspec').json.Encoder().encode
+        case 'json': return _stdlib_dumps
+
+class RecordWriter(abc.ABC):
+    """
+    Writes records to a binary file object, buffering the encoded output
+    and writing it in chunks of about `buffer_size` bytes. Subclasses
+    implement encode(), and optionally header() and footer(). Use it as a
+    context manager, or call close(), to write what is left. The file
+    object itself is not closed.
+    """
+
+    def __init__(
+        self,
+        fh: typing.IO[bytes],
+        backend: JsonBackend = 'json',
+        buffer_size: int = BUFFER_SIZE
+    ):
+        self.fh = fh
+        self.encoder = json_encoder(backend)
+        self.buffer_size = buffer_size
+        self.records = 0
+        self.started = False
+        self._chunks: list[bytes] = []
+        self._size = 0
+
+    @abc.abstractmethod
+    def encode(self, record: typing.Any) -> bytes: ...
+
+    def header(self, record: typing.Any) -> bytes:
+        return b''
+
+    def footer(self) -> bytes:
+        return b''
+
+    def _append(self, chunk: bytes):
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def write(self, record: typing.Any):
+        if not self.started:
+            self._append(self.header(record))
+            self.started = True
+
+        self._append(self.encode(record))
+        self.records += 1
+
+    def write_many(self, records: typing.Iterable[typing.Any]):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        if self._chunks:
+            self.fh.write(b''.join(self._chunks))
+            self._chunks.clear()
+            self._size = 0
+
+    def close(self):
+        self._append(self.footer())
+        self.flush()
+        self.fh.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_: typing.Any):
+        self.close()
+
+class NdjsonWriter(RecordWriter):
+    def encode(self, record: typing.Any) -> bytes:
+        return self.encoder(record) + b'\n'
+
+class JsonArrayWriter(RecordWriter):
+    """
+    Writes a single JSON array, one record per line.
+    """
+
+    def header(self, record: typing.Any) -> bytes:
+        return b'['
+
+    def encode(self, record: typing.Any) -> bytes:
+        return (b',\n' if self.records else b'') + self.encoder(record)
+
+    def footer(self) -> bytes:
+        return b']\n' if self.started else b'[]\n'
+
+class CsvWriter(RecordWriter):
+    """
+    Writes one row per record, with the paths of flatten(record) (minus
+    the leading ".") as columns. Columns are taken from the first record
+    unless `fields` is given. Like csv.DictWriter, paths that aren't a
+    column raise a ValueError, or are dropped with extrasaction='ignore'.
+    """
+
+    def __init__(
+        self,
+        fh: typing.IO[bytes],
+        fields: list[str] | None = None,
+        extrasaction: typing.Literal['raise', 'ignore'] = 'raise',
+        backend: JsonBackend = 'json',
+        buffer_size: int = BUFFER_SIZE
+    ):
+        super().__init__(fh, backend, buffer_size)
+        self.fields = fields
+        self.extrasaction = extrasaction
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer, lineterminator='\n')
+
+    @staticmethod
+    def _row(record: typing.Any) -> dict[str, typing.Any]:
+        return {
+            path[1:] if path[:1] == '.' else path: value
+            for path, value in flatten(record).items()
+        }
+
+    def _line(self, values: list[typing.Any]) -> bytes:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._csv.writerow(values)
+        return self._buffer.getvalue().encode()
+
+    @staticmethod
+    def _cell(value: typing.Any) -> typing.Any:
+        match value:
+            case None: return ''
+            case bool(): return 'true' if value else 'false'
+            case _: return value
+
+    def header(self, record: typing.Any) -> bytes:
+        if self.fields is None:
+            self.fields = list(self._row(record))
+        return self._line(self.fields)
+
+    def encode(self, record: typing.Any) -> bytes:
+        row = self._row(record)
+        fields = typing.cast(list[str], self.fields)
+
+        if self.extrasaction == 'raise' and row.keys() - fields:
+            extra = [path for path in row if path not in fields]
+            raise ValueError('record contains fields not in the columns: %s' % ', '.join(extra))
+
+        return self._line([self._cell(row.get(field)) for field in fields])
+
+WRITERS: dict[OutputFormat, type[RecordWriter]] = {
+    'ndjson': NdjsonWriter,
+    'array': JsonArrayWriter,
+    'csv': CsvWriter
+}
+
+def open_writer(fh: typing.IO[bytes], output_format: OutputFormat = 'ndjson', **options: typing.Any) -> RecordWriter:
+    return WRITERS[output_format](fh, **options)
+
+def write_to(writer: RecordWriter, records: typing.Iterable[typing.Any]) -> list[RecordError]:
+    """
+    Writes each of `records` to `writer`. Like translate_many(), a record
+    that can't be written (not JSON serializable, or with paths that aren't
+    CSV columns) becomes a RecordError instead of aborting the rest, and
+    RecordErrors among `records` are passed through.
+    """
+    errors: list[RecordError] = []
+    for index, record in enumerate(records):
+        if isinstance(record, RecordError):
+            errors.append(record)
+            continue
+
+        try:
+            writer.write(record)
+        except (ValueError, TypeError) as e:
+            errors.append(RecordError(index, '%s: %s' % (e.__class__.__name__, e)))
+
+    return errors
+
+def translate_to(
+    writer: RecordWriter,
+    records: typing.Iterable[typing.Any],
+    mapping: Mapping | CompiledMapping,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    substitute: dict[str, typing.Any] = {}
+) -> list[RecordError]:
+    """
+    Writes the translation of each of `records` to `writer` as soon as it
+    is produced, so only a chunk of results is held in memory at a time.
+    Records that fail to translate or to be written are skipped and their
+    RecordErrors returned. The writer is left open.
+    """
+    return write_to(writer, translate_many(records, mapping, workers=workers, chunk_size=chunk_size, substitute=substitute))
@@ -0,0 +1,32 @@
+# pyright: basic
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from src.normalize_json.normalize import translate
+from src.normalize_json.parallel import RecordError
+from src.normalize_json.aio import atranslate, atranslate_stream
+from tests.translate_array_entry import mapping1, sample1
+
+mapping = { **mapping1, 'array': False }
+
+async def source(records):
+    for record in records:
+        await asyncio.sleep(0)
+        yield record
+
+class TestAtranslate(IsolatedAsyncioTestCase):
+    async def test_atranslate(self):
+        self.assertEqual(await atranslate(sample1[0], mapping), translate(sample1[0], mapping))
+
+    async def test_atranslate_stream_ordered(self):
+        records = sample1 * 10
+        result = [r async for r in atranslate_stream(source(records), mapping, concurrency=3, chunk_size=4)]
+        self.assertEqual(result, [translate(record, mapping) for record in records])
+
+    async def test_atranslate_stream_unordered(self):
+        records = sample1 * 10 + [{ 'idade': 1 }]
+        result = [r async for r in atranslate_stream(records, mapping, chunk_size=2, ordered=False)]
+        errors = [r for r in result if isinstance(r, RecordError)]
+
+        self.assertEqual(len(result), len(records))
+        self.assertEqual([e.record_index for e in errors], [40])
@@ -0,0 +1,71 @@
+# pyright: basic
+
+import os
+import json
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from src.normalize_json.normalize import set_value_cache, translate, value_cache_stats
+from src.normalize_json.codegen import compile_function
+from src.normalize_json.cache import cache_directory, generator_digest, load_function, load_mapping
+from tests.translate import mapping1, sample1
+
+class TestCache(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'mapping.json')
+        self.cache_dir = os.path.join(self.tmp.name, 'cache')
+
+        with open(self.path, 'w') as fh:
+            fh.write(json.dumps(mapping1))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_hit(self):
+        expected = translate(sample1, mapping1)
+        self.assertEqual(load_function(self.path, self.cache_dir)(sample1), expected)
+        self.assertEqual(len(os.listdir(cache_directory(self.cache_dir))), 1)
+
+        with patch('src.normalize_json.cache.generate_source') as generate_source:
+            self.assertEqual(load_function(self.path, self.cache_dir)(sample1), expected)
+            self.assertEqual(translate(sample1, load_mapping(self.path, self.cache_dir)), expected)
+            generate_source.assert_not_called()
+
+    def test_cache_invalidation(self):
+        load_function(self.path, self.cache_dir)
+
+        with open(self.path, 'w') as fh:
+            fh.write(json.dumps({ **mapping1, 'modifiers': ['default_null'] }))
+
+        load_function(self.path, self.cache_dir)
+        self.assertEqual(len(os.listdir(cache_directory(self.cache_dir))), 2)
+
+    def test_cache_corrupt(self):
+        load_function(self.path, self.cache_dir)
+        directory = cache_directory(self.cache_dir)
+        entry = os.path.join(directory, os.listdir(directory)[0])
+
+        with open(entry, 'wb') as fh:
+            fh.write(b'\x00garbage')
+
+        self.assertEqual(load_function(self.path, self.cache_dir)(sample1), translate(sample1, mapping1))
+        self.assertGreater(os.path.getsize(entry), 10)
+
+    def test_cache_generator(self):
+        # code from another version of the generator is never read back
+        self.assertIn(generator_digest(), os.path.basename(cache_directory(self.cache_dir)))
+
+    def test_cache_value_cache_size(self):
+        expected = translate(sample1, mapping1)
+
+        try:
+            for size in [100, 0, 100]:
+                set_value_cache(size)
+                self.assertEqual(load_function(self.path, self.cache_dir)(sample1), expected)
+                self.assertEqual(compile_function(mapping1)(sample1), expected)
+                self.assertEqual(bool(value_cache_stats(load_mapping(self.path, self.cache_dir))), size > 0)
+        finally:
+            set_value_cache(0)
+
+        self.assertEqual(len(os.listdir(cache_directory(self.cache_dir))), 2)
@@ -0,0 +1,123 @@
+# pyright: basic
+
+import io
+import os
+import json
+import tempfile
+import contextlib
+from unittest import TestCase
+from src.normalize_json.cli import CliOptions, expand_targets, read_manifest, run, main
+
+mapping = {
+    '__fields': {
+        'name': {
+            'map': 'nome',
+            'type': 'string'
+        }
+    }
+}
+
+class TestCliRun(TestCase):
+    def test_run_resume(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            inputs = os.path.join(tmp, 'in')
+            output_dir = os.path.join(inputs, 'out')
+            os.makedirs(os.path.join(inputs, 'sub'))
+
+            for path, content in [('a.json', { 'nome': 'joao' }), ('sub/b.json', { 'idade': 30 })]:
+                with open(os.path.join(inputs, path), 'w') as fh:
+                    json.dump(content, fh)
+
+            options: CliOptions = { 'target': inputs, 'op': 'translate', 'output_dir': output_dir }
+            results, skipped = run(expand_targets(inputs, output_dir), options, mapping)
+
+            self.assertEqual(skipped, 0)
+            self.assertEqual([r['status'] for r in results], ['done', 'failed'])
+            with open(os.path.join(output_dir, 'a.json')) as fh:
+                self.assertEqual(json.load(fh), { 'name': 'joao' })
+            self.assertFalse(os.path.exists(os.path.join(output_dir, 'sub', 'b.json')))
+
+            # outputs inside the input directory aren't picked up as inputs
+            self.assertEqual(len(expand_targets(inputs, output_dir)), 2)
+
+            with open(os.path.join(inputs, 'sub/b.json'), 'w') as fh:
+                json.dump({ 'nome': 'thor' }, fh)
+
+            results, skipped = run(expand_targets(inputs, output_dir), options, mapping)
+            self.assertEqual(skipped, 1)
+            self.assertEqual([(r['target'], r['status']) for r in results], [(os.path.join(inputs, 'sub', 'b.json'), 'done')])
+            self.assertEqual({ r['status'] for r in read_manifest(output_dir).values() }, { 'done' })
+
+            # a deleted output is written again
+            os.remove(os.path.join(output_dir, 'a.json'))
+            results, skipped = run(expand_targets(inputs, output_dir), options, mapping)
+            self.assertEqual((skipped, [r['target'] for r in results]), (1, [os.path.join(inputs, 'a.json')]))
+
+            # and so is everything when the mapping or options change
+            changed = { '__fields': { 'nome': { 'map': 'nome' } } }
+            results, skipped = run(expand_targets(inputs, output_dir), options, changed)
+            self.assertEqual((skipped, len(results)), (0, 2))
+            with open(os.path.join(output_dir, 'a.json')) as fh:
+                self.assertEqual(json.load(fh), { 'nome': 'joao' })
+
+            results, skipped = run(expand_targets(inputs, output_dir), { **options, 'op': 'flatten' }, changed)
+            self.assertEqual((skipped, len(results)), (0, 2))
+
+    def test_run_output_collision(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ['a.json', 'a.ndjson', 'manifest.json']:
+                with open(os.path.join(tmp, name), 'w') as fh:
+                    fh.write('{"nome": "a"}\n')
+
+            output_dir = os.path.join(tmp, 'out')
+            options: CliOptions = { 'target': tmp, 'op': 'translate', 'format': 'ndjson', 'output_dir': output_dir }
+            with self.assertRaisesRegex(ValueError, 'a.json and .*a.ndjson would both be written to'):
+                run(expand_targets(tmp, output_dir), options, mapping)
+
+            with self.assertRaisesRegex(ValueError, 'manifest.ndjson and .*manifest.json would both'):
+                run(expand_targets(os.path.join(tmp, 'm*.json'), output_dir), options, mapping)
+
+            self.assertFalse(os.path.exists(os.path.join(output_dir, 'a.ndjson')))
+
+    def test_main_glob_characters(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            target = os.path.join(tmp, 'data[1].json')
+            with open(target, 'w') as fh:
+                json.dump({ 'nome': 'joao' }, fh)
+
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                main({ 'target': target, 'op': 'flatten' })
+
+            self.assertEqual(json.loads(stdout.getvalue()), { '.nome': 'joao' })
+
+            output_dir = os.path.join(tmp, 'out')
+            self.assertEqual(expand_targets(target, output_dir), [target])
+            with contextlib.redirect_stderr(io.StringIO()):
+                main({ 'target': target, 'op': 'flatten', 'output_dir': output_dir })
+
+            with open(os.path.join(output_dir, 'data[1].json')) as fh:
+                self.assertEqual(json.load(fh), { '.nome': 'joao' })
+
+    def test_main_no_match(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit) as exit:
+                main({ 'target': os.path.join(tmp, '*.json'), 'op': 'flatten', 'output_dir': os.path.join(tmp, 'out') })
+
+            self.assertEqual(exit.exception.code, 1)
+            self.assertIn('no files match', stderr.getvalue())
+
+    def test_run_ndjson_jobs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(3):
+                with open(os.path.join(tmp, '%d.ndjson' % i), 'w') as fh:
+                    fh.write('{"nome": "a"}\n{"idade": 1}\n{"nome": "b"}\n')
+
+            output_dir = os.path.join(tmp, 'out')
+            options: CliOptions = { 'target': tmp, 'op': 'translate', 'format': 'ndjson', 'output': 'csv', 'output_dir': output_dir, 'jobs': 2 }
+            results, _ = run(expand_targets(os.path.join(tmp, '*.ndjson')), options, mapping)
+
+            self.assertEqual([(r['records'], r['errors']) for r in results], [(3, 1)] * 3)
+            with open(os.path.join(output_dir, '1.csv')) as fh:
+                self.assertEqual(fh.read(), 'name\na\nb\n')
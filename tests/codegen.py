@@ -0,0 +1,92 @@
+# pyright: basic
+
+import json
+from unittest import TestCase
+from src.normalize_json.normalize import Mapping, Profiler, compile_mapping, translate
+from src.normalize_json.codegen import compile_function, generate_source
+from tests import translate as translate_tests, translate_array_entry
+
+mapping1: Mapping = {
+    'modifiers': [
+        'enforce',
+        'default_null'
+    ],
+    '__fields': {
+        'id': {
+            'map': 'code | .meta.id',
+            'type': 'integer'
+        },
+        'name': {
+            'map': 'missing',
+            'default': 'unnamed',
+            'trim_end': 4
+        },
+        'origin': {
+            'map': '{{ origin }}'
+        },
+        'tags': {
+            'map': 'tags',
+            'array': True,
+            'default': 'other',
+            'enum': {
+                'a': 'alpha',
+                'b': 'beta'
+            }
+        }
+    }
+}
+
+sample1 = {
+    'meta': {
+        'id': '12'
+    },
+    'tags': ['a', 'b']
+}
+
+class TestCodegen(TestCase):
+    def test_codegen_output(self):
+        for sample, mapping in [
+            (translate_tests.sample1, translate_tests.mapping1),
+            (translate_tests.sample2, translate_tests.mapping2),
+            (translate_array_entry.sample1, translate_array_entry.mapping1),
+            (sample1, mapping1)
+        ]:
+            fn = compile_function(mapping)
+            self.assertEqual(
+                fn(sample, { 'origin': 'test', 'secrets.key': 'abc' }),
+                translate(sample, mapping, substitute={ 'origin': 'test', 'secrets.key': 'abc' })
+            )
+
+        self.assertEqual(compile_function(mapping1)(sample1, { 'origin': 'test' }), {
+            'id': 12,
+            'name': 'unna',
+            'origin': 'test',
+            'tags': ['alpha', 'beta']
+        })
+
+    def test_codegen_errors(self):
+        fn = compile_function({
+            '__fields': {
+                'id': {
+                    'map': 'code'
+                }
+            }
+        })
+
+        with self.assertRaisesRegex(ValueError, 'value for code wasnt provided'):
+            fn({})
+
+        with self.assertRaisesRegex(ValueError, r'check_types @ id \(got "int", expected "string"\)'):
+            fn({ 'code': 1 })
+
+    def test_codegen_cache(self):
+        fn = compile_function(mapping1)
+        self.assertIs(compile_function(json.loads(json.dumps(mapping1))), fn)
+        self.assertIsNot(compile_function(compile_mapping(mapping1)), fn)
+        self.assertIn('def _m0(target, target_index, resolver, substitute):', generate_source(mapping1))
+
+    def test_codegen_profiler(self):
+        with Profiler() as profiler:
+            compile_function(mapping1)(sample1, { 'origin': 'test' })
+
+        self.assertEqual(profiler.fields['id']['calls'], 1)
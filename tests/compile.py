@@ -0,0 +1,89 @@
+# pyright: basic
+
+import json
+import copy
+from unittest import TestCase
+from unittest.mock import patch
+from src.normalize_json.normalize import CompiledMapping, compile_mapping, unserialize, translate
+from tests.translate import mapping1, sample1, mapping2, sample2
+
+class TestCompile(TestCase):
+    def test_compile_matches_translate(self):
+        for mapping, sample in [(mapping1, sample1), (mapping2, sample2)]:
+            compiled = compile_mapping(mapping)
+            self.assertIsInstance(compiled, CompiledMapping)
+            self.assertEqual(compiled.apply(unserialize(sample)), translate(unserialize(sample), mapping))
+            self.assertEqual(translate(unserialize(sample), compiled), translate(unserialize(sample), mapping))
+
+    def test_compile_examples(self):
+        with open('examples/mapping5.json') as fh:
+            compiled = compile_mapping(json.loads(fh.read()))
+        with open('examples/sample5.json') as fh:
+            sample = json.loads(fh.read())
+
+        self.assertEqual(compiled.apply(sample), [
+            { 'name': 'joselito', 'idade': 40.0 },
+            { 'name': 'boça', 'idade': 32.0 }
+        ])
+        self.assertEqual(compiled.apply(sample[:1]), [
+            { 'name': 'joselito', 'idade': 40.0 }
+        ])
+
+    def test_compile_reverse(self):
+        compiled = compile_mapping({
+            'modifiers': [
+                'reverse'
+            ],
+            '__fields': {
+                'nome': {
+                    'map': 'name',
+                    'type': 'string'
+                }
+            }
+        })
+
+        self.assertEqual(compiled.fields[0].name, 'name')
+        self.assertEqual(compiled.apply({ 'nome': 'joao' }), { 'name': 'joao' })
+
+    def test_compile_substitute(self):
+        compiled = compile_mapping(mapping2)
+        result = compiled.apply(unserialize(sample2), substitute={
+            'secrets.key': 'abc123'
+        })
+
+        self.assertEqual(result['secret_key'], 'abc123')
+
+    def test_compile_cached_plan(self):
+        mapping = {
+            '__fields': {
+                'name': {
+                    'map': 'nome',
+                    'type': 'string'
+                },
+                'status': {
+                    'map': 'situacao',
+                    'enum': { 'A': 'active' }
+                }
+            }
+        }
+
+        record = { 'nome': 'joao', 'situacao': 'A' }
+        self.assertEqual(translate(record, mapping), { 'name': 'joao', 'status': 'active' })
+
+        # the plan is reused by identity, changes made in place take
+        # compiling the mapping again
+        mapping['__fields']['name']['map'] = 'situacao'
+        self.assertEqual(translate(record, mapping), { 'name': 'joao', 'status': 'active' })
+        self.assertEqual(translate(record, compile_mapping(mapping)), { 'name': 'A', 'status': 'active' })
+        self.assertEqual(translate(record, copy.deepcopy(mapping)), { 'name': 'A', 'status': 'active' })
+
+        with patch('src.normalize_json.normalize.compile_mapping', side_effect=compile_mapping) as compile:
+            fresh = copy.deepcopy(mapping)
+            for _ in range(3):
+                translate(record, fresh)
+
+        self.assertEqual(compile.call_count, 1)
+
+        compiled = compile_mapping(mapping)
+        self.assertIs(compiled.fields[0].modifiers, compiled.fields[1].modifiers)
+        self.assertFalse(compiled.fields[0].enforce)
@@ -1,7 +1,7 @@
 # pyright: basic
 
 from unittest import TestCase
-from src.normalize_json.normalize import flatten
+from src.normalize_json.normalize import PathResolver, compile_alternative, flatten, iter_flatten
 
 class TestFlatten(TestCase):
     def test_flatten_array(self):
@@ -33,3 +33,86 @@ class TestFlatten(TestCase):
         self.assertEqual(result['[0].person.details.dogs'], ['thor', 'bobby'])
         self.assertEqual(result['[1].person.name'], 'also joao')
         self.assertEqual(result['[1].person.details.dogs'], ['spike'])
+
+    def test_path_resolver(self):
+        sample = {
+            'person': {
+                'name': 'joao',
+                'age': 0,
+                'details': {
+                    'dogs': [
+                        { 'name': 'thor' },
+                        { 'name': 'bobby' }
+                    ]
+                }
+            },
+            'person.name': 'dotted'
+        }
+
+        flat = flatten(sample)
+        flat_arr = flatten(sample, preserve_arrays=True)
+        resolver = PathResolver(sample)
+
+        for path in list(flat) + list(flat_arr) + ['.person', '.missing', '.person.details.dogs[2].name']:
+            self.assertEqual(resolver.get(path), flat.get(path))
+            self.assertEqual(resolver.get_preserved(path), (path in flat_arr, flat_arr.get(path)))
+
+        self.assertEqual(resolver.get('.person.name'), 'dotted')
+        self.assertEqual(resolver.get_preserved('.person.details.dogs'), (True, [{ '.name': 'thor' }, { '.name': 'bobby' }]))
+
+    def test_path_resolver_template(self):
+        sample = {
+            'items': [
+                { 'sku': 'a', 'tags': ['x'], 'meta': { 'id': 1 } },
+                { 'sku': 'b', 'tags': [], 'meta': { 'id': 2 } }
+            ],
+            'rows': [[1, 2], [3]]
+        }
+
+        names = ['.items[].sku', '.items[].tags', '.items[].meta.id', '.items[]', '.rows[][0]', '.missing[].sku', '[].sku']
+        for name in names:
+            for index in range(3):
+                path = name.replace('[]', '[%d]' % index)
+                self.assertEqual(PathResolver(sample).resolve_template(path, compile_alternative(name), index), PathResolver(sample).resolve(path))
+
+        # a key that spells the expanded path takes the lookup elsewhere
+        ambiguous = { **sample, 'items[1].sku': 'c' }
+        resolver = PathResolver(ambiguous)
+        self.assertEqual(resolver.resolve_template('.items[1].sku', compile_alternative('.items[].sku'), 1)[0], 'c')
+
+    def test_iter_flatten(self):
+        sample = {
+            'person': {
+                'name': 'joao',
+                'details': {
+                    'dogs': [
+                        { 'name': 'thor' },
+                        { 'name': 'bobby' }
+                    ]
+                }
+            },
+            'id': 1
+        }
+
+        for preserve_arrays in [False, True]:
+            self.assertEqual(list(iter_flatten(sample, preserve_arrays=preserve_arrays)), list(flatten(sample, preserve_arrays=preserve_arrays).items()))
+
+        self.assertEqual(dict(iter_flatten(sample, max_depth=2)), {
+            '.person.name': 'joao',
+            '.person.details': sample['person']['details'],
+            '.id': 1
+        })
+
+        self.assertEqual(dict(iter_flatten(sample, prefix='.person.details.dogs[1]')), {
+            '.person.details.dogs[1].name': 'bobby'
+        })
+
+        self.assertEqual(list(iter_flatten('scalar')), [])
+
+    def test_flatten_deep(self):
+        sample = value = {}
+        for _ in range(5000):
+            value['next'] = value = {}
+        value['leaf'] = True
+
+        self.assertEqual(flatten(sample), { '.next' * 5000 + '.leaf': True })
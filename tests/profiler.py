@@ -0,0 +1,105 @@
+# pyright: basic
+
+import json
+import asyncio
+import threading
+from unittest import TestCase
+from src.normalize_json.aio import atranslate
+from src.normalize_json.normalize import Mapping, Profiler, handle_modifiers, translate
+from tests.translate_array_entry import mapping1, sample1
+
+mapping2: Mapping = {
+    'modifiers': [
+        'enforce',
+        'default_null'
+    ],
+    '__fields': {
+        'id': {
+            'map': 'code | id',
+            'type': 'integer'
+        },
+        'name': {
+            'map': 'missing'
+        },
+        'origin': {
+            'map': '{{ origin }}'
+        },
+        'meta': {
+            'type': 'object',
+            '__fields': {
+                'price': {
+                    'map': '.price.value',
+                    'type': 'number'
+                }
+            }
+        }
+    }
+}
+
+sample2 = {
+    'id': '12',
+    'price': {
+        'value': '9.50'
+    }
+}
+
+class TestProfiler(TestCase):
+    def test_profiler(self):
+        with Profiler() as profiler:
+            for _ in range(3):
+                result = translate(sample2, mapping2, substitute={ 'origin': 'test' })
+
+        self.assertEqual(result, translate(sample2, mapping2, substitute={ 'origin': 'test' }))
+
+        fields = profiler.to_dict()
+        self.assertEqual(list(fields.keys()), ['id', 'meta', 'meta.price', 'name', 'origin'])
+        self.assertEqual(fields['id']['calls'], 3)
+        self.assertEqual(fields['id']['hits'], { 1: 3 })
+        self.assertEqual(fields['id']['casts'], 3)
+        self.assertEqual(fields['name']['hits'], { -1: 3 })
+        self.assertEqual(fields['origin']['hits'], { 0: 3 })
+        self.assertEqual(fields['meta.price']['casts'], 3)
+        self.assertGreaterEqual(fields['meta']['time_ns'], fields['meta.price']['time_ns'])
+        self.assertEqual(json.loads(profiler.to_json()).keys(), fields.keys())
+
+        stacks = [line.rsplit(' ', 1)[0] for line in profiler.to_collapsed().splitlines()]
+        self.assertIn('root;meta;price', stacks)
+        self.assertIn('root;id', stacks)
+
+    def test_profiler_disabled(self):
+        with Profiler() as profiler:
+            pass
+
+        translate(sample1, mapping1)
+        self.assertEqual(profiler.fields, {})
+
+    def test_profiler_threads(self):
+        with Profiler() as profiler:
+            thread = threading.Thread(target=translate, args=(sample2, mapping2), kwargs={ 'substitute': { 'origin': 'test' } })
+            thread.start()
+            thread.join()
+            asyncio.run(atranslate(sample1, mapping1))
+
+            self.assertEqual(profiler.fields, {})
+            translate(sample2, mapping2, substitute={ 'origin': 'test' })
+
+        self.assertEqual(profiler.fields['id']['calls'], 1)
+        self.assertEqual(profiler.current, '')
+
+    def test_profiler_handle_modifiers(self):
+        with Profiler() as profiler:
+            handle_modifiers({ 'type': 'integer' }, 'age', ['enforce'], '12')
+            handle_modifiers({ 'type': 'integer' }, 'age', ['enforce'], 12)
+
+        self.assertEqual(profiler.fields['']['casts'], 1)
+
+    def test_profiler_arrays(self):
+        with Profiler() as profiler:
+            translate(sample1, mapping1)
+
+        fields = profiler.to_dict()
+        nested = [path for path in fields if '.' in path]
+        self.assertTrue(nested)
+        for path in nested:
+            parent = path.rsplit('.', 1)[0]
+            self.assertIn(parent, fields)
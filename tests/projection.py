@@ -0,0 +1,48 @@
+# pyright: basic
+
+import json
+from unittest import TestCase
+from src.normalize_json.normalize import Mapping, translate
+from src.normalize_json.projection import parse_projected, source_paths
+from tests.translate import mapping1, sample1
+
+class TestProjection(TestCase):
+    def test_source_paths(self):
+        mapping: Mapping = {
+            '__fields': {
+                'name': {
+                    'map': 'nome'
+                },
+                'city': {
+                    'map': '.endereco.cidade'
+                },
+                'items': {
+                    'map': 'itens',
+                    'array': True,
+                    '__fields': {
+                        'sku': {
+                            'map': 'codigo'
+                        }
+                    }
+                }
+            }
+        }
+
+        paths = source_paths(mapping)
+        self.assertLessEqual({ '.nome', '.endereco.cidade', '.itens', '.itens[].codigo' }, paths)
+        self.assertNotIn('.endereco', paths)
+
+    def test_parse_projected(self):
+        raw = json.dumps({ **sample1, 'blob': { 'events': [{ 'text': 'a "quoted" ]}' }] * 50 } })
+        projected = parse_projected(raw.encode(), source_paths(mapping1))
+
+        self.assertNotIn('blob', projected)
+        self.assertEqual(translate(projected, mapping1), translate(json.loads(raw), mapping1))
+        self.assertEqual(parse_projected(raw, ['']), json.loads(raw))
+
+    def test_parse_projected_indexes(self):
+        raw = json.dumps({ 'a': [{ 'b': 1, 'c': 2 }, { 'b': 3, 'c': 4 }], 'd.e': 5, 'd': { 'e': 6 } })
+
+        self.assertEqual(parse_projected(raw, ['.a[1].b']), { 'a': [None, { 'b': 3 }] })
+        self.assertEqual(parse_projected(raw, ['.a[].c', '.d.e']), { 'a': [{ 'c': 2 }, { 'c': 4 }], 'd.e': 5, 'd': { 'e': 6 } })
+        self.assertRaises(ValueError, parse_projected, raw + ' {}', ['.a'])
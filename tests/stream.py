@@ -0,0 +1,94 @@
+# pyright: basic
+
+import io
+import math
+import mmap
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from src.normalize_json import normalize
+from src.normalize_json.normalize import JSON_BACKEND, unserialize
+from src.normalize_json.stream import iter_json_array, iter_records
+
+class TestStream(TestCase):
+    def test_iter_json_array(self):
+        records = [{ 'price': 1.5e3, 'name': 'joao' }, [], -12, 'a, b]', None]
+        source = '[ {"price": 1.5e3, "name": "joao"},\n[], -12 , "a, b]", null ]'
+
+        for chunk_size in [1, 2, 3, 64]:
+            self.assertEqual(list(iter_json_array(io.StringIO(source), chunk_size)), records)
+
+        for chunk_size in [1, 2, 3]:
+            self.assertEqual(list(iter_json_array(io.StringIO('["\\u00e9", true, false, -Infinity]'), chunk_size)), ['é', True, False, float('-inf')])
+
+        self.assertEqual(list(iter_json_array(io.StringIO('[]'))), [])
+        for invalid in ['', '{}', '[1,,2]', '[1 2]', '[1,']:
+            with self.assertRaises(ValueError):
+                list(iter_json_array(io.StringIO(invalid), 2))
+
+    def test_iter_json_array_invalid_stops_reading(self):
+        class Reader(io.StringIO):
+            read_size = 0
+
+            def read(self, size: int | None = -1) -> str:
+                chunk = super().read(size)
+                self.read_size += len(chunk)
+                return chunk
+
+        fh = Reader('[1,,' + ','.join(['{"name": "joao"}'] * 100000) + ']')
+        with self.assertRaisesRegex(ValueError, 'invalid JSON array element'):
+            list(iter_json_array(fh, 64))
+
+        self.assertLessEqual(fh.read_size, 64)
+
+    def test_iter_ndjson(self):
+        source = '{"name": "joao"}\n\n{"name": "thor"}\n'
+        self.assertEqual(list(iter_records(io.StringIO(source), 'ndjson')), [
+            { 'name': 'joao' },
+            { 'name': 'thor' }
+        ])
+
+    def test_iter_ndjson_backend(self):
+        # lines read from a file object go through the selected backend,
+        # like the lines of a buffer
+        source = '{"a": 1}\n{"a": 2}\n'
+        with patch.object(normalize, '_loads', side_effect=normalize._loads) as loads:
+            self.assertEqual(list(iter_records(io.StringIO(source), 'ndjson')), [{ 'a': 1 }, { 'a': 2 }])
+            self.assertEqual(loads.call_count, 2)
+
+            self.assertEqual(list(unserialize(source, 'application/x-ndjson')), [{ 'a': 1 }, { 'a': 2 }])
+            self.assertEqual(loads.call_count, 4)
+
+    def test_unserialize_buffers(self):
+        source = b'{"name": "joao", "tags": [1, 2]}'
+        expected = { 'name': 'joao', 'tags': [1, 2] }
+
+        for raw in [source, bytearray(source), memoryview(source), source.decode()]:
+            self.assertEqual(unserialize(raw), expected)
+
+        with tempfile.TemporaryFile() as fh:
+            fh.write(source)
+            fh.flush()
+
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                self.assertEqual(unserialize(buffer), expected)
+
+        ndjson = b'{"a": 1}\n\n  \n{"a": 2}\r\n{"a": 3}'
+        with tempfile.TemporaryFile() as fh:
+            fh.write(ndjson)
+            fh.flush()
+
+            # an unfinished iterator must not keep the mapping from closing
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                records = unserialize(buffer, 'application/x-ndjson')
+                self.assertEqual(next(records), { 'a': 1 })
+
+        for raw in [memoryview(ndjson), ndjson.decode()]:
+            self.assertEqual(list(unserialize(raw, 'application/x-ndjson')), [{ 'a': 1 }, { 'a': 2 }, { 'a': 3 }])
+
+    def test_unserialize_default_backend(self):
+        # fast backends are opt-in, the default keeps big integers and NaN
+        if JSON_BACKEND == 'json':
+            parsed = unserialize(b'{"id": 123456789012345678901234567890, "score": NaN}')
+            self.assertEqual(parsed['id'], 123456789012345678901234567890)
+            self.assertTrue(math.isnan(parsed['score']))
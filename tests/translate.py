@@ -1,7 +1,11 @@
 # pyright: basic
 
+from datetime import datetime, timezone
+import dateutil.parser as dateparser
 from unittest import TestCase
-from src.normalize_json.normalize import Mapping, unserialize, translate
+from unittest.mock import patch
+from src.normalize_json.normalize import Mapping, DocumentIndex, PathResolver, check_types, handle_modifiers, parse_datetime, set_datetime_cache, unserialize, translate
+from src.normalize_json.codegen import compile_function
 
 mapping1: Mapping = {
     '__fields': {
@@ -246,3 +250,85 @@ class TestTranslate(TestCase):
 
         self.assertEqual(result['secret_key'], 'abc123')
         self.assertEqual(result['items']['data'][0]['age'], 20)
+
+    def test_translate_nested_resolver(self):
+        def nested(depth: int):
+            node = { '__fields': { 'name': { 'map': '.nome', 'type': 'string' } } }
+            for _ in range(depth):
+                node = { 'type': 'object', '__fields': { 'group': node, 'age': { 'map': '.idade', 'type': 'integer' } } }
+            return node
+
+        for depth in [1, 3, 6]:
+            with patch.object(PathResolver, '_walk_unique', autospec=True, side_effect=PathResolver._walk_unique) as walk:
+                result = translate(unserialize(sample1), nested(depth))
+
+            self.assertEqual(result['age'], 23)
+            self.assertEqual(walk.call_count, 2)
+
+    def test_translate_document_index(self):
+        index = DocumentIndex(sample1)
+        mappings = [mapping1, { '__fields': { 'name': { 'map': '.nome' }, 'age': { 'map': '.idade', 'type': 'integer' } } }]
+
+        self.assertIs(index.record, sample1)
+        for mapping in mappings:
+            self.assertEqual(translate(index, mapping), translate(sample1, mapping))
+            self.assertEqual(compile_function(mapping)(index), translate(sample1, mapping))
+
+        with patch.object(PathResolver, '_walk_unique', autospec=True, side_effect=PathResolver._walk_unique) as walk:
+            for mapping in mappings:
+                translate(index, mapping)
+
+        self.assertEqual(walk.call_count, 0)
+
+    def test_translate_datetime(self):
+        mapping: Mapping = {
+            'modifiers': [
+                'enforce'
+            ],
+            '__fields': {
+                'created_at': {
+                    'type': 'datetime'
+                },
+                'paid_at': {
+                    'type': 'datetime',
+                    'datetime_format': 'iso'
+                },
+                'due_at': {
+                    'type': 'datetime',
+                    'datetime_format': '%d/%m/%Y'
+                }
+            }
+        }
+
+        sample = {
+            'created_at': '2023-01-02 10:00:05.5',
+            'paid_at': '2023-01-02T10:00:05+00:00',
+            'due_at': '05/01/2023'
+        }
+
+        set_datetime_cache(16)
+        try:
+            for _ in range(2):
+                result = translate(sample, mapping)
+                self.assertEqual(result['created_at'], dateparser.parse(sample['created_at']))
+                self.assertEqual(result['paid_at'], datetime(2023, 1, 2, 10, 0, 5, tzinfo=timezone.utc))
+                self.assertEqual(result['due_at'], datetime(2023, 1, 5))
+        finally:
+            set_datetime_cache(0)
+
+        for value in ['2023-01-02', '2023-01-02T10:00', '2023-01-02T10:00:05Z', 'Jan 2 2023']:
+            self.assertEqual(parse_datetime(value), dateparser.parse(value))
+
+    def test_check_types_handle_modifiers(self):
+        self.assertIsNone(check_types({ 'type': 'number' }, 1, []))
+        self.assertEqual(check_types({ 'type': 'integer' }, '7', []), ('str', 'integer'))
+        self.assertEqual(check_types({ 'enum': { 'A': 'a' } }, 'B', []), ('B', ['A']))
+        self.assertIsNone(check_types({ 'type': 'string' }, None, ['default_null']))
+
+        node = { 'type': 'integer', 'trim_end': 5, 'default': '10' }
+        self.assertEqual(handle_modifiers(node, 'age', ['enforce'], 'R$ 1234567'), 12)
+        self.assertEqual(handle_modifiers(node, 'age', ['enforce'], None), 10)
+        self.assertEqual(handle_modifiers({ 'type': 'datetime', 'datetime_format': 'iso' }, 'at', ['enforce'], '2023-01-02'), datetime(2023, 1, 2))
+
+        with self.assertRaisesRegex(ValueError, 'value for age wasnt provided'):
+            handle_modifiers({ 'type': 'integer' }, 'age', [], None)
@@ -0,0 +1,89 @@
+# pyright: basic
+
+from unittest import TestCase
+from src.normalize_json.normalize import Mapping, cast_numbers, translate
+from src.normalize_json.batch import translate_batch
+from tests.translate_array_entry import mapping1, sample1
+
+mapping2: Mapping = {
+    'modifiers': [
+        'enforce',
+        'default_null'
+    ],
+    '__fields': {
+        'id': {
+            'map': 'codigo',
+            'type': 'integer'
+        },
+        'price': {
+            'map': '.preco.valor',
+            'type': 'number'
+        },
+        'status': {
+            'map': 'situacao',
+            'enum': {
+                'A': 'active',
+                'I': 'inactive'
+            }
+        },
+        'sku': {
+            'map': 'sku | codigo_barras',
+            'type': 'string',
+            'pick_until': '-'
+        }
+    }
+}
+
+sample2 = [
+    {
+        'codigo': str(i),
+        'preco': { 'valor': '%d.50' % i },
+        'situacao': 'AI'[i % 2],
+        'codigo_barras': 'x-%d' % i
+    }
+    for i in range(50)
+]
+
+class TestTranslateBatch(TestCase):
+    def test_translate_batch_output(self):
+        mapping = { **mapping1, 'array': False }
+        self.assertEqual(translate_batch(sample1, mapping), [translate(r, mapping) for r in sample1])
+        self.assertEqual(translate_batch(sample2, mapping2, block_size=7), [translate(r, mapping2) for r in sample2])
+
+    def test_translate_batch_errors(self):
+        mapping: Mapping = {
+            '__fields': {
+                'name': {
+                    'map': 'nome',
+                    'type': 'string'
+                },
+                'age': {
+                    'map': 'idade',
+                    'type': 'integer'
+                }
+            }
+        }
+
+        records = [
+            { 'nome': 'joao', 'idade': 23 },
+            { 'nome': 'thor', 'idade': '7' },
+            { 'idade': 50 }
+        ]
+
+        with self.assertRaisesRegex(ValueError, 'check_types @ age'):
+            translate_batch(records, mapping)
+
+    def test_cast_numbers(self):
+        values = ['R$ 1.234', '', '12 unidades', 'é5', 'sem valor']
+        self.assertEqual(cast_numbers(values, 'number'), [1.234, 0.0, 12.0, 5.0, 0.0])
+        self.assertEqual(cast_numbers(values, 'integer'), [1234, 0, 12, 5, 0])
+        self.assertEqual(cast_numbers(['1\n2', '3'], 'integer'), [12, 3])
+
+        with self.assertRaisesRegex(ValueError, "could not convert string to float: '1.2.3'"):
+            cast_numbers(['1', '1.2.3'], 'number')
+
+        records = [{ 'codigo': code } for code in ['7', '1.2.3', 'x']]
+        mapping: Mapping = { '__fields': { 'id': { 'map': 'codigo', 'type': 'number', 'modifiers': ['enforce'] } } }
+
+        with self.assertRaisesRegex(ValueError, "'1.2.3'"):
+            translate_batch(records, mapping)
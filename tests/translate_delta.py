@@ -0,0 +1,73 @@
+# pyright: basic
+
+import copy
+from unittest import TestCase
+from unittest.mock import patch
+from src.normalize_json import delta as delta_module
+from src.normalize_json.normalize import Mapping, compile_mapping, translate
+from src.normalize_json.delta import field_dependencies, translate_delta
+from tests.translate import mapping1, sample1
+
+class TestTranslateDelta(TestCase):
+    def test_field_dependencies(self):
+        dependencies = field_dependencies(mapping1)
+        self.assertEqual(dependencies['name'].keys, { 'nome' })
+        self.assertIn('profissoes', dependencies['array_elem'].keys)
+        self.assertIn('detalhes', dependencies['array_copy'].keys)
+        self.assertFalse(dependencies['name'].variable)
+
+    def test_translate_delta(self):
+        plan = compile_mapping(mapping1)
+        previous = translate(sample1, plan)
+
+        changed = copy.deepcopy(sample1)
+        changed['idade'] = 24
+        changed['cachorro']['apelido'] = 'Bobby'
+
+        with patch.object(delta_module, '_translate', side_effect=delta_module._translate) as translate_fields:
+            delta = translate_delta(sample1, previous, changed, plan)
+
+        self.assertEqual(delta.output, translate(changed, plan))
+        self.assertEqual(list(delta.output), list(previous))
+        self.assertIn('age', delta.changed)
+        self.assertNotIn('name', delta.changed)
+
+        recomputed = translate_fields.call_args_list[0].args[1].fields
+        self.assertNotIn('name', [node.name for node in recomputed])
+
+        unchanged = translate_delta(sample1, previous, copy.deepcopy(sample1), plan)
+        self.assertEqual(unchanged, (previous, ()))
+
+    def test_translate_delta_raw_mapping(self):
+        mapping = copy.deepcopy(mapping1)
+        previous = translate(sample1, mapping)
+        changed = { **sample1, 'idade': 24 }
+
+        translate_delta(sample1, previous, changed, mapping)
+        size = len(delta_module._dependencies)
+        for _ in range(3):
+            delta = translate_delta(sample1, previous, changed, mapping)
+
+        self.assertEqual(len(delta_module._dependencies), size)
+        self.assertEqual(delta.output, translate(changed, mapping))
+        self.assertEqual(field_dependencies(mapping), field_dependencies(compile_mapping(mapping)))
+
+    def test_translate_delta_types(self):
+        mapping: Mapping = {
+            '__fields': {
+                'price': {
+                    'map': 'price',
+                    'type': 'number'
+                },
+                'secret': {
+                    'map': '{{ secret }}'
+                }
+            }
+        }
+
+        # 1 == 1.0, but the output changes type
+        previous = translate({ 'price': 1 }, mapping, substitute={ 'secret': 'a' })
+        delta = translate_delta({ 'price': 1 }, previous, { 'price': 1.0 }, mapping, substitute={ 'secret': 'b' })
+
+        self.assertIsInstance(delta.output['price'], float)
+        self.assertEqual(set(delta.changed), { 'price', 'secret' })
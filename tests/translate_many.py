@@ -0,0 +1,25 @@
+# pyright: basic
+
+from unittest import TestCase
+from src.normalize_json.normalize import translate
+from src.normalize_json.parallel import RecordError, translate_many
+from tests.translate_array_entry import mapping1, sample1
+
+class TestTranslateMany(TestCase):
+    def test_translate_many_order(self):
+        mapping = { **mapping1, 'array': False }
+        records = sample1 * 5
+        expected = [translate(record, mapping) for record in records]
+
+        self.assertEqual(list(translate_many(records, mapping)), expected)
+        self.assertEqual(list(translate_many(records, mapping, workers=2, chunk_size=3)), expected)
+
+    def test_translate_many_errors(self):
+        mapping = { **mapping1, 'array': False }
+        records = [sample1[0], { 'idade': 30 }, sample1[1]]
+        result = list(translate_many(records, mapping, workers=2, chunk_size=1))
+
+        self.assertEqual(result[0]['name'], 'João')
+        self.assertIsInstance(result[1], RecordError)
+        self.assertEqual(result[1].record_index, 1)
+        self.assertEqual(result[2]['name'], 'Pedro')
@@ -1,7 +1,7 @@
 # pyright: basic
 
 from unittest import TestCase
-from src.normalize_json.normalize import StringMapping, unserialize, translate_string
+from src.normalize_json.normalize import StringMapping, compile_string_mapping, unserialize, translate_string, translate_strings
 
 mapping1: StringMapping = {
   '__fields': {
@@ -38,3 +38,28 @@ class TestTranslateString(TestCase):
         self.assertEqual('cancelled', translate_string('cancelada', mapping1))
         self.assertEqual('cancelled', translate_string('estorno pendente', mapping1))
         self.assertEqual(None, translate_string('unexisting', mapping1))
+
+    def test_compile_string_mapping(self):
+        compiled = compile_string_mapping(mapping1, strict=False)
+        values = ['pagamento aprovado', 'cancelada', 'devolvida', '', 'unexisting']
+
+        self.assertEqual(translate_strings(values, compiled), [translate_string(v, mapping1) for v in values])
+        self.assertEqual(translate_string('estorno pendente', compiled), 'cancelled')
+
+        with self.assertRaises(ValueError):
+            compile_string_mapping(mapping1)
+
+    def test_compile_string_mapping_casefold(self):
+        compiled = compile_string_mapping({
+            '__fields': {
+                'paid': ['Pagamento Aprovado', 'pago'],
+                'waiting_payment': 'em análise'
+            }
+        }, casefold=True, normalize='NFC')
+
+        self.assertEqual(compiled.translate_strings(['PAGO', 'pagamento aprovado', 'EM ANÁLISE', 'x']), [
+            'paid',
+            'paid',
+            'waiting_payment',
+            None
+        ])
@@ -0,0 +1,55 @@
+# pyright: basic
+
+import json
+import glob
+from unittest import TestCase
+from src.normalize_json.normalize import MappingError, validate_mapping
+from tests.translate import mapping1, mapping2
+
+class TestValidateMapping(TestCase):
+    def test_valid_mappings(self):
+        for mapping in [mapping1, mapping2]:
+            validate_mapping(mapping)
+
+        for path in glob.glob('examples/mapping*.json'):
+            with open(path) as fh:
+                validate_mapping(json.loads(fh.read()))
+
+    def test_invalid_mapping(self):
+        with self.assertRaises(MappingError) as ctx:
+            validate_mapping({
+                'modifiers': ['enforse'],
+                '__fields': {
+                    'name': {
+                        'map': 'nome',
+                        'type': 'strin',
+                        'pick_until': ''
+                    },
+                    'items': {
+                        'array': 'yes',
+                        '__fields': {
+                            'sku': {
+                                'map': ['sku', 'codigo'],
+                                'modifiers': ['reverse'],
+                                'trim_end': True,
+                                'defualt': None
+                            }
+                        }
+                    },
+                    'age': 'idade'
+                }
+            })
+
+        self.assertEqual(ctx.exception.errors, [
+            "mapping: unknown modifier 'enforse'",
+            "name: unknown type 'strin'",
+            'name: pick_until must be a non-empty string',
+            'items: array must be a boolean',
+            "items.sku: unknown key 'defualt'",
+            'items.sku: reverse needs a single name in map',
+            'items.sku: trim_end must be an integer',
+            'age: node must be an object'
+        ])
+
+        with self.assertRaisesRegex(MappingError, '__fields not present'):
+            validate_mapping({ 'array': True })
@@ -0,0 +1,67 @@
+# pyright: basic
+
+from unittest import TestCase
+from src.normalize_json.normalize import Mapping, compile_mapping, set_value_cache, translate, value_cache_stats
+from src.normalize_json.codegen import compile_function
+
+mapping1: Mapping = {
+    '__fields': {
+        'status': {
+            'map': 'situacao',
+            'modifiers': ['normalize_unicode'],
+            'pick_until': ' - ',
+            'cache': 2
+        },
+        'code': {
+            'map': 'codigo',
+            'enum': {
+                'A': 'active',
+                'I': 'inactive'
+            },
+            'cache': 8
+        },
+        'tags': {
+            'map': 'tags',
+            'array': True
+        }
+    }
+}
+
+sample1 = [
+    { 'situacao': 'Aprovação - %d' % (i % 3), 'codigo': 'AI'[i % 2], 'tags': ['x'] }
+    for i in range(10)
+]
+
+class TestValueCache(TestCase):
+    def test_value_cache(self):
+        plain = { '__fields': { name: { k: v for k, v in node.items() if k != 'cache' } for name, node in mapping1['__fields'].items() } }
+        compiled = compile_mapping(mapping1)
+
+        self.assertEqual([translate(r, compiled) for r in sample1], [translate(r, plain) for r in sample1])
+        self.assertEqual(value_cache_stats(compiled), {
+            'status': { 'hits': 0, 'misses': 10, 'size': 2, 'maxsize': 2 },
+            'code': { 'hits': 8, 'misses': 2, 'size': 2, 'maxsize': 8 }
+        })
+
+        fn = compile_function(compiled)
+        self.assertEqual([fn(r) for r in sample1], [translate(r, plain) for r in sample1])
+        self.assertEqual(value_cache_stats(compiled)['code']['hits'], 18)
+
+    def test_value_cache_errors(self):
+        compiled = compile_mapping(mapping1)
+        for _ in range(2):
+            with self.assertRaisesRegex(ValueError, 'value for situacao wasnt provided'):
+                translate({ 'codigo': 'A' }, compiled)
+
+        self.assertEqual(value_cache_stats(compiled)['status']['size'], 0)
+
+    def test_set_value_cache(self):
+        set_value_cache(16)
+        try:
+            compiled = compile_mapping({ '__fields': { **mapping1['__fields'], 'status': { 'map': 'situacao' } } })
+        finally:
+            set_value_cache(0)
+
+        self.assertEqual(set(value_cache_stats(compiled)), { 'status', 'code' })
+        self.assertEqual(value_cache_stats(compiled)['status']['maxsize'], 16)
+        self.assertEqual(value_cache_stats(compile_mapping(mapping1)).keys(), { 'status', 'code' })
@@ -0,0 +1,87 @@
+# pyright: basic
+
+import io
+import json
+from unittest import TestCase
+from src.normalize_json.normalize import translate
+from src.normalize_json.stream import iter_records
+from src.normalize_json.writers import RecordWriter, CsvWriter, open_writer, translate_to, write_to
+from tests.translate_array_entry import mapping1, sample1
+
+records = [
+    { 'name': 'João', 'meta': { 'age': 23, 'active': True }, 'tags': ['a', 'b'] },
+    { 'name': 'Thor, "the dog"', 'meta': { 'age': None, 'active': False }, 'tags': ['c'] }
+]
+
+class TestWriters(TestCase):
+    def test_json_writers(self):
+        for output_format in ['ndjson', 'array']:
+            fh = io.BytesIO()
+            with open_writer(fh, output_format, buffer_size=16) as writer:
+                writer.write_many(records)
+
+            self.assertEqual(list(iter_records(io.StringIO(fh.getvalue().decode()), output_format)), records)
+
+        fh = io.BytesIO()
+        with open_writer(fh, 'array'):
+            pass
+        self.assertEqual(json.loads(fh.getvalue()), [])
+
+    def test_csv_writer(self):
+        fh = io.BytesIO()
+        with open_writer(fh, 'csv') as writer:
+            writer.write_many(records[:1])
+
+        self.assertEqual(fh.getvalue().decode(), 'name,meta.age,meta.active,tags[0],tags[1]\nJoão,23,true,a,b\n')
+
+        fh = io.BytesIO()
+        with CsvWriter(fh, fields=['name', 'meta.age', 'tags[1]'], extrasaction='ignore') as writer:
+            writer.write_many(records)
+
+        self.assertEqual(fh.getvalue().decode(), 'name,meta.age,tags[1]\nJoão,23,b\n"Thor, ""the dog""",,\n')
+
+        with self.assertRaisesRegex(ValueError, 'not in the columns: meta.age, meta.active'):
+            CsvWriter(io.BytesIO(), fields=['name']).write_many(records)
+
+        fh = io.BytesIO()
+        with CsvWriter(fh, fields=['name'], extrasaction='ignore') as writer:
+            writer.write_many(records)
+        self.assertEqual(fh.getvalue().decode().splitlines()[1:], ['João', '"Thor, ""the dog"""'])
+
+    def test_translate_to(self):
+        mapping = { **mapping1, 'array': False }
+        fh = io.BytesIO()
+
+        with open_writer(fh) as writer:
+            errors = translate_to(writer, [sample1[0], { 'idade': 30 }, sample1[1]], mapping, workers=2, chunk_size=1)
+
+        self.assertEqual([error.record_index for error in errors], [1])
+        self.assertEqual(writer.records, 2)
+        self.assertEqual(
+            [json.loads(line) for line in fh.getvalue().splitlines()],
+            [translate(sample1[0], mapping), translate(sample1[1], mapping)]
+        )
+
+    def test_write_to_errors(self):
+        fh = io.BytesIO()
+        with open_writer(fh, 'csv') as writer:
+            errors = write_to(writer, [{ 't': [1] }, { 't': [1, 2] }, { 't': [] }])
+
+        self.assertEqual([error.record_index for error in errors], [1])
+        self.assertIn('t[1]', errors[0].error)
+        self.assertEqual(fh.getvalue().decode(), 't[0]\n1\n""\n')
+
+        fh = io.BytesIO()
+        with open_writer(fh, 'array') as writer:
+            errors = write_to(writer, [{ 'at': object() }, { 'a': 1 }])
+
+        self.assertEqual([error.record_index for error in errors], [0])
+        self.assertEqual(json.loads(fh.getvalue()), [{ 'a': 1 }])
+
+    def test_record_writer_abstract(self):
+        class Incomplete(RecordWriter):
+            def header(self, record):
+                return b'['
+
+        with self.assertRaises(TypeError):
+            Incomplete(io.BytesIO())